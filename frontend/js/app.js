@@ -9,6 +9,10 @@ let userButton, userDropdown, signInBtn, checkoutModal, cartSidebar, floatingCar
 
 // API Configuration
 const API_BASE = window.location.origin.replace(':3000', ':8000');
+// Counter whose menu is shown (?outlet=<id>, remembered for later visits)
+const OUTLET = new URLSearchParams(window.location.search).get('outlet') || localStorage.getItem('outlet');
+if (OUTLET) localStorage.setItem('outlet', OUTLET);
+const OUTLET_QUERY = OUTLET ? `?outlet=${encodeURIComponent(OUTLET)}` : '';
 
 // Initialize the app
 document.addEventListener('DOMContentLoaded', function() {
@@ -187,7 +191,7 @@ async function handleLogout() {
 async function loadCategories() {
     try {
         console.log('Loading categories...');
-        const response = await fetch(`${API_BASE}/api/menu-categories/`);
+        const response = await fetch(`${API_BASE}/api/menu-categories/${OUTLET_QUERY}`);
         
         if (response.ok) {
             const categories = await response.json();
@@ -242,7 +246,7 @@ async function loadMenuItems() {
         console.log('menuGrid element:', menuGrid);
         
         showLoading();
-        const response = await fetch(`${API_BASE}/api/menu-items/`);
+        const response = await fetch(`${API_BASE}/api/menu-items/${OUTLET_QUERY}`);
         
         console.log('Response status:', response.status);
         
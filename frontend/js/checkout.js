@@ -17,6 +17,10 @@ async function initializeCheckoutPage() {
         displayOrderSummary();
         bindCheckoutEvents();
         updateTotals();
+
+        // Keep slot availability fresh while the student fills in the form
+        loadPickupSlots();
+        setInterval(loadPickupSlots, 15000);
         
         // If cart is empty, show empty message
         if (cartItems.length === 0) {
@@ -226,6 +230,7 @@ async function handleOrderSubmission(e) {
         room_number: formData.get('roomNumber') || '',
         special_instructions: formData.get('specialInstructions') || '',
         payment_method: formData.get('paymentMethod'),
+        ...(formData.get('pickupTime') ? { pickup_time: formData.get('pickupTime') } : {}),
         items: cartItems.map(item => ({
             menu_item: item.id,
             quantity: item.quantity,
@@ -270,6 +275,13 @@ async function handleOrderSubmission(e) {
                 window.location.href = `index.html?orderSuccess=${result.id}`;
             }, 2000);
             
+        } else if (response.status === 409) {
+            // Slot filled up while the form was open: offer the next free one
+            const errorData = await response.json();
+            await loadPickupSlots(errorData.next_slot);
+            showToast(errorData.next_slot
+                ? `That pickup slot just filled up. Next free slot: ${formatSlotTime(errorData.next_slot)}`
+                : (errorData.error || 'No pickup slots are free right now'), 'error');
         } else {
             const errorData = await response.json();
             throw new Error(errorData.error || 'Failed to place order');
@@ -283,6 +295,36 @@ async function handleOrderSubmission(e) {
     }
 }
 
+// Pickup Slots
+function formatSlotTime(isoString) {
+    return new Date(isoString).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
+}
+
+async function loadPickupSlots(selectSlot) {
+    const select = document.getElementById('checkoutPickupSlot');
+    if (!select) return;
+
+    try {
+        const response = await fetch(`${API_BASE}/api/pickup-slots/`, { credentials: 'include' });
+        if (!response.ok) return;
+        const pickupSlots = await response.json();
+        const selected = selectSlot || select.value;
+
+        select.innerHTML = '<option value="">As soon as possible</option>';
+        pickupSlots.forEach(slot => {
+            const option = document.createElement('option');
+            option.value = slot.start;
+            option.disabled = slot.remaining === 0;
+            option.textContent = `${formatSlotTime(slot.start)} – ${formatSlotTime(slot.end)}` +
+                (slot.remaining === 0 ? ' (full)' : ` (${slot.remaining} left)`);
+            option.selected = slot.start === selected && !option.disabled;
+            select.appendChild(option);
+        });
+    } catch (error) {
+        console.error('Error loading pickup slots:', error);
+    }
+}
+
 // UI Functions
 function showLoadingOverlay() {
     document.getElementById('loadingOverlay').style.display = 'flex';
@@ -1,6 +1,16 @@
 // Orders page JS for live updates and filtering
 const API_BASE = window.location.origin.replace(':3000', ':8000');
 const WS_BASE = API_BASE.replace('http', window.location.protocol === 'https:' ? 'wss' : 'ws');
+// Counter this screen belongs to (?outlet=<id>); empty shows every counter
+const OUTLET = new URLSearchParams(window.location.search).get('outlet') || '';
+
+function tableUrl(status) {
+    const params = new URLSearchParams();
+    if (OUTLET) params.set('outlet', OUTLET);
+    if (status) params.set('status', status);
+    const query = params.toString();
+    return `${API_BASE}/api/orders/table/${query ? `?${query}` : ''}`;
+}
 
 let ordersSocket = null;
 
@@ -13,7 +23,7 @@ document.addEventListener('DOMContentLoaded', function() {
     // Force HTMX to hit the Django API (8000) instead of current origin (3000)
     const container = document.getElementById('ordersTableContainer');
     if (container) {
-        container.setAttribute('hx-get', `${API_BASE}/api/orders/table/`);
+        container.setAttribute('hx-get', tableUrl());
         container.setAttribute('hx-credentials', 'include');
         try { if (window.htmx) htmx.process(container); } catch (e) { console.error('HTMX init error', e); }
         // Always perform an immediate fetch-based load (avoids CORS preflight header issues)
@@ -25,7 +35,7 @@ document.addEventListener('DOMContentLoaded', function() {
     // After HTMX swaps, re-point hx-get to absolute API again (template may contain relative path)
     document.body.addEventListener('htmx:afterSwap', (e) => {
         if (e.target && e.target.id === 'ordersTableContainer') {
-            e.target.setAttribute('hx-get', `${API_BASE}/api/orders/table/`);
+            e.target.setAttribute('hx-get', tableUrl(document.getElementById('statusFilter').value));
             e.target.setAttribute('hx-credentials', 'include');
         }
     });
@@ -42,23 +52,22 @@ document.addEventListener('DOMContentLoaded', function() {
 
 function initWebSocket() {
     try {
-        ordersSocket = new WebSocket(`${WS_BASE}/ws/orders/`);
+        ordersSocket = new WebSocket(`${WS_BASE}/ws/orders/${OUTLET ? `?outlet=${encodeURIComponent(OUTLET)}` : ''}`);
         
+        // Frames handled on this socket, acked so the server can hold back
+        // (and eventually resync) when this screen falls behind
+        let framesReceived = 0;
+
         ordersSocket.onopen = function(e) {
+            ordersSocket.send(JSON.stringify({action: 'ack', received: 0}));
             console.log('WebSocket connection established');
             showToast('Connected to live order updates', 'success');
         };
         
         ordersSocket.onmessage = function(e) {
-            const data = JSON.parse(e.data);
-            
-            if (data.type === 'new_order') {
-                showToast('New order received!', 'info');
-                refreshOrdersTable();
-            } else if (data.type === 'order_update') {
-                showToast('Order status updated', 'success');
-                refreshOrdersTable();
-            }
+            handleSocketFrame(JSON.parse(e.data));
+            framesReceived += 1;
+            ordersSocket.send(JSON.stringify({action: 'ack', received: framesReceived}));
         };
         
         ordersSocket.onclose = function(e) {
@@ -80,12 +89,29 @@ function initWebSocket() {
     }
 }
 
+function handleSocketFrame(data) {
+    // The server may coalesce several events into one batch frame,
+    // or ask us to reload everything after we fell behind
+    if (data.type === 'resync') {
+        refreshOrdersTable();
+        return;
+    }
+    const events = data.type === 'batch' ? data.events : [data];
+    const types = new Set(events.map(event => event.type));
+
+    if (types.has('new_order')) {
+        showToast('New order received!', 'info');
+    } else if (types.has('order_update')) {
+        showToast('Order status updated', 'success');
+    }
+    if (types.has('new_order') || types.has('order_update')) {
+        refreshOrdersTable();
+    }
+}
+
 function filterOrders() {
     const status = document.getElementById('statusFilter').value;
-    let url = `${API_BASE}/api/orders/table/`;
-    if (status) {
-        url += `?status=${status}`;
-    }
+    const url = tableUrl(status);
     document.getElementById('ordersTableContainer').setAttribute('hx-get', url);
     htmx.trigger(document.getElementById('ordersTableContainer'), 'refresh');
 }
@@ -185,16 +211,24 @@ function showToast(message, type = 'success') {
 window.updateOrderStatus = updateOrderStatus;
 
 // Fallback loader using fetch if HTMX is unavailable or blocked
+let lastTableEtag = null;
+let lastTableUrl = null;
+
 async function loadOrdersTable() {
     try {
         const status = document.getElementById('statusFilter').value;
-        let url = `${API_BASE}/api/orders/table/`;
-        if (status) url += `?status=${encodeURIComponent(status)}`;
-        const resp = await fetch(url, { credentials: 'include' });
+        const url = tableUrl(status);
+        // The browser revalidates with If-None-Match; an unchanged table comes
+        // back from its cache with the same ETag, so skip the DOM swap
+        const resp = await fetch(url, { credentials: 'include', cache: 'no-cache' });
         if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+        const etag = resp.headers.get('ETag');
+        if (etag && etag === lastTableEtag && url === lastTableUrl) return;
         const html = await resp.text();
         const container = document.getElementById('ordersTableContainer');
         if (container) container.outerHTML = html;
+        lastTableEtag = etag;
+        lastTableUrl = url;
     } catch (err) {
         console.error('Fallback loadOrdersTable failed:', err);
     }
@@ -1,3 +1,42 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from canteen.throttling import get_store
+
+
+@override_settings(REST_FRAMEWORK={
+    'DEFAULT_THROTTLE_RATES': {'login': '100/min', 'login.account': '2/min'},
+})
+class LoginThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(
+            username='2021cs1234@iiitkota.ac.in',
+            email='2021cs1234@iiitkota.ac.in',
+            password='correct-horse',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        get_store().clear()
+
+    def login(self, email, password, ip='127.0.0.1'):
+        return self.client.post('/api/auth/login/', {'email': email, 'password': password}, format='json',
+                                REMOTE_ADDR=ip)
+
+    def test_repeated_failures_on_one_account_are_throttled(self):
+        self.assertEqual(self.login('2021cs1234@iiitkota.ac.in', 'wrong').status_code, 401)
+        self.assertEqual(self.login('2021CS1234@iiitkota.ac.in ', 'wrong').status_code, 401)
+        self.assertEqual(self.login('2021cs1234@iiitkota.ac.in', 'correct-horse').status_code, 429)
+
+    def test_other_accounts_are_not_affected(self):
+        for _ in range(2):
+            self.login('2021cs1234@iiitkota.ac.in', 'wrong')
+        self.assertEqual(self.login('2022cs0001@iiitkota.ac.in', 'wrong').status_code, 401)
+
+    def test_failures_from_elsewhere_do_not_lock_the_owner_out(self):
+        for _ in range(3):
+            self.login('2021cs1234@iiitkota.ac.in', 'wrong', ip='203.0.113.9')
+        self.assertEqual(self.login('2021cs1234@iiitkota.ac.in', 'wrong', ip='203.0.113.9').status_code, 429)
+        self.assertEqual(self.login('2021cs1234@iiitkota.ac.in', 'correct-horse').status_code, 200)
@@ -5,10 +5,11 @@ from django.views.decorators.http import require_http_methods
 from django.contrib.auth.models import User
 import json
 import re
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from canteen.throttling import LoginThrottle, RegisterThrottle
 
 def is_student_email(email):
     """Check if email follows student pattern"""
@@ -55,6 +56,7 @@ def is_staff_email(email):
 
 @ensure_csrf_cookie
 @api_view(['POST'])
+@throttle_classes([LoginThrottle])
 @csrf_protect
 def login_view(request):
     try:
@@ -131,6 +133,7 @@ def login_view(request):
 
 @ensure_csrf_cookie
 @api_view(['POST'])
+@throttle_classes([RegisterThrottle])
 @csrf_protect
 def register_view(request):
     """Register new student account"""
@@ -1,22 +1,140 @@
+from django import forms
 from django.contrib import admin
-from .models import MenuCategory, MenuItem, Order, OrderItem
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db.models import Q
+from .models import MenuCategory, MenuItem, Notification, Order, OrderItem, Outlet, PickupSlot, PrintJob
+from .pagination import EstimatedCountPaginator
+from .routers import may_read_replica, use_replica
+
+@admin.register(Outlet)
+class OutletAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'slug', 'is_active')
+    prepopulated_fields = {'slug': ('name',)}
 
 @admin.register(MenuCategory)
 class MenuCategoryAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'description')
+    list_display = ('id', 'name', 'outlet', 'description')
+    list_filter = ('outlet',)
+    list_select_related = ('outlet',)
+    search_fields = ('name',)
 
 @admin.register(MenuItem)
 class MenuItemAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'price', 'available', 'category')
-    list_filter = ('available', 'category')
+    list_display = ('id', 'name', 'price', 'available', 'category', 'outlet')
+    list_filter = ('outlet', 'available', 'category')
+    list_select_related = ('category', 'outlet')
+    # Also backs the menu_item autocomplete on order items
+    search_fields = ('name',)
+
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    """Autocomplete that labels its current value from an already loaded object.
+
+    The stock widget queries the selected object again for every inline row.
+    """
+    selected_object = None
+
+    def optgroups(self, name, value, attr=None):
+        obj = self.selected_object
+        if obj is None or [str(v) for v in value] != [str(obj.pk)]:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        label = self.choices.field.label_from_instance(obj)
+        options.append(self.create_option(name, obj.pk, label, True, len(options)))
+        return [(None, options, 0)]
 
-from .models import Order, OrderItem
+class OrderItemInlineForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.menu_item_id:
+            # Loaded by OrderItemInline.get_queryset's select_related
+            widget = self.fields['menu_item'].widget
+            getattr(widget, 'widget', widget).selected_object = self.instance.menu_item
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
-    extra = 1
+    form = OrderItemInlineForm
+    extra = 0
+    # Search-as-you-type instead of a <select> of the whole menu per row
+    autocomplete_fields = ('menu_item',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('menu_item')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'menu_item':
+            kwargs['widget'] = PreloadedAutocompleteSelect(
+                db_field, self.admin_site, using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ('id', 'customer_name', 'status', 'total_price', 'created_at')
+    list_display = ('id', 'outlet', 'customer_name', 'status', 'total_price', 'created_at')
+    list_filter = ('outlet', 'status', 'payment_method')
+    list_select_related = ('outlet',)
+    date_hierarchy = 'created_at'
+    ordering = ('-created_at',)
+    # Only documents the search box; get_search_results does the lookup
+    search_fields = ('=id', '=customer_email', '=customer_phone')
+    raw_id_fields = ('user', 'pickup_slot')
     inlines = [OrderItemInline]
+
+    # Skip COUNT(*) over the whole table on every changelist load
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+    def get_search_results(self, request, queryset, search_term):
+        # The stock search ORs a LIKE per field, which scans every order.
+        # Match the order number, email or phone exactly so each arm is an
+        # index lookup; names are not searchable
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        lookup = Q(customer_email=term) | Q(customer_phone=term)
+        if term.isdigit() and len(term) < 19:
+            lookup |= Q(pk=int(term))
+        return queryset.filter(lookup), False
+
+    def changelist_view(self, request, extra_context=None):
+        # Order browsing and date drill-downs are reports: read them from the
+        # replica, rendering inside the block so the lazy page query goes too
+        with use_replica(may_read_replica(request)):
+            response = super().changelist_view(request, extra_context)
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+@admin.register(PickupSlot)
+class PickupSlotAdmin(admin.ModelAdmin):
+    list_display = ('start', 'reserved', 'capacity')
+    date_hierarchy = 'start'
+    ordering = ('-start',)
+
+@admin.register(PrintJob)
+class PrintJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'order', 'printer', 'status', 'attempts', 'next_attempt_at', 'created_at', 'printed_at')
+    list_filter = ('status', 'printer')
+    list_select_related = ('order',)
+    raw_id_fields = ('order',)
+    readonly_fields = ('last_error',)
+    actions = ['reprint']
+
+    @admin.action(description='Print again')
+    def reprint(self, request, queryset):
+        queryset.update(status='pending', attempts=0, next_attempt_at=None, last_error='')
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'order', 'channel', 'recipient', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'channel')
+    list_select_related = ('order',)
+    raw_id_fields = ('order',)
+    search_fields = ('=order__id', '=recipient')
+    readonly_fields = ('last_error',)
+    actions = ['resend']
+
+    @admin.action(description='Send again')
+    def resend(self, request, queryset):
+        queryset.update(status='pending', attempts=0, next_attempt_at=None, last_error='')
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CanteenConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'canteen'
+
+    def ready(self):
+        # Menu snapshot invalidation hooks
+        from . import snapshots  # noqa: F401
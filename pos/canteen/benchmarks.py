@@ -0,0 +1,603 @@
+"""Micro-benchmarks for canteen hot paths.
+
+Register a benchmark with ``@benchmark('name')``; it returns a mapping of
+case label to seconds per operation, to a ``measure()`` record that also
+counts the queries one operation makes, or to ``{'count': n}`` for a case
+that counts something other than time. Run them with
+``python manage.py benchmark [name ...]``.
+
+``--record baseline.json`` saves the results and ``--check baseline.json``
+fails the run when a case got slower by more than ``--threshold`` or its
+query count or count went up. Baselines are per machine, so record one on the
+box that runs the check.
+"""
+import time
+from contextlib import contextmanager
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def per_call(func, number=10000, repeat=5):
+    """Best-of-``repeat`` seconds per call of ``func`` over ``number`` calls"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def measure(func, number=100, repeat=3):
+    """``per_call`` timing plus the queries one call of ``func`` makes"""
+    from django.db import connection
+
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    # Counted with a wrapper rather than the query log, which every
+    # request_started signal resets. Doubles as a warm-up call.
+    with connection.execute_wrapper(count):
+        func()
+    return {'seconds': per_call(func, number, repeat), 'queries': queries}
+
+
+def as_record(result):
+    return result if isinstance(result, dict) else {'seconds': result}
+
+
+def find_regressions(baseline, results, threshold=0.25, noise=1e-6):
+    """Describe every case in ``results`` that is more than ``threshold``
+    (a fraction) slower than in ``baseline``, or whose query count or count
+    went up.
+
+    Slowdowns under ``noise`` seconds are ignored; nanosecond cases jitter
+    by more than any sensible threshold.
+    """
+    regressions = []
+    for name, cases in results.items():
+        for label, record in cases.items():
+            before = baseline.get(name, {}).get(label)
+            if before is None:
+                continue
+            if ('seconds' in record and 'seconds' in before
+                    and record['seconds'] > before['seconds'] * (1 + threshold)
+                    and record['seconds'] - before['seconds'] > noise):
+                regressions.append(f"{name}: {label}: {before['seconds'] * 1e6:.2f} µs -> "
+                                   f"{record['seconds'] * 1e6:.2f} µs")
+            for key, unit in (('queries', ' queries'), ('count', '')):
+                if record.get(key, 0) > before.get(key, float('inf')):
+                    regressions.append(f"{name}: {label}: {before[key]} -> {record[key]}{unit}")
+    return regressions
+
+
+@contextmanager
+def scratch_database():
+    """Swap the default database for a throwaway test database, so seeded
+    benchmark rows never touch real data"""
+    from django.db import connection
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextmanager
+def file_database(path):
+    """Point the default database at a SQLite file for the block, so several
+    threads (and a replica copy) can share it"""
+    from django.db import connection
+
+    old_name = connection.settings_dict['NAME']
+    connection.close()
+    connection.settings_dict['NAME'] = path
+    try:
+        yield
+    finally:
+        connection.close()
+        connection.settings_dict['NAME'] = old_name
+
+
+@benchmark('throttle')
+def bench_throttle():
+    from django.contrib.sessions.backends.signed_cookies import SessionStore
+    from django.test import override_settings
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from .throttling import CheckoutThrottle, MemoryBucketStore, get_store
+
+    results = {}
+    store = MemoryBucketStore()
+    results['memory store, hot key'] = per_call(
+        lambda: store.consume('bench', 10 ** 9, 10 ** 9))
+
+    # Every call a new client: exercises insertion and LRU eviction
+    churn = MemoryBucketStore(maxsize=1000)
+    counter = iter(range(10 ** 9))
+    results['memory store, new key each call'] = per_call(
+        lambda: churn.consume(f'bench:{next(counter)}', 10, 1))
+
+    django_request = APIRequestFactory().post('/api/orders/')
+    django_request.session = SessionStore()
+    django_request.session.cycle_key()
+    request = Request(django_request)
+    throttle = CheckoutThrottle()
+    # A bucket big enough never to deny, so every call takes the full path
+    rates = {'DEFAULT_THROTTLE_RATES': {'checkout': f'{10 ** 9}/s'}}
+    with override_settings(REST_FRAMEWORK=rates, THROTTLE_STORE='memory'):
+        get_store()
+        results['CheckoutThrottle.allow_request (ip+session+account)'] = per_call(
+            lambda: throttle.allow_request(request, None))
+    return results
+
+
+@benchmark('fanout')
+def bench_fanout(students=2000, staff=20, events=200):
+    """Deliver order events to 2,000 tracking sockets and 20 staff screens.
+
+    Groups are plain sets of simulated sockets, each doing the consumer's
+    per-event work (serialise and queue one frame), so the numbers show the
+    cost of fan-out itself rather than of a particular channel layer.
+    Each case also reports how many sockets one event reached.
+    """
+    import json
+    from collections import defaultdict
+
+    from .broadcast import STAFF_GROUP, order_group, order_groups
+
+    class Order:
+        outlet_id = None
+
+        def __init__(self, id, status):
+            self.id, self.status = id, status
+
+    def run(scoped, serialize_once):
+        groups = defaultdict(set)
+        outboxes = [[] for _ in range(staff + students)]
+        for socket in range(staff):
+            groups[STAFF_GROUP].add(socket)
+        for order_id in range(students):
+            # Legacy behaviour: every socket sits in the single orders group
+            groups[order_group(order_id) if scoped else STAFF_GROUP].add(staff + order_id)
+
+        data = {'id': 0, 'status': 'ready', 'items': [{'menu_item': 1, 'quantity': 2}]}
+        start = time.perf_counter()
+        for event in range(events):
+            order = Order(event % students, 'ready')
+            targets = order_groups(order, 'preparing') if scoped else [STAFF_GROUP]
+            text = json.dumps({'type': 'order_update', 'data': data})
+            for group in targets:
+                for socket in groups.get(group, ()):
+                    if not serialize_once:
+                        text = json.dumps({'type': 'order_update', 'data': data})
+                    outboxes[socket].append(text)
+        elapsed = time.perf_counter() - start
+        return elapsed / events, sum(map(len, outboxes)) / events
+
+    results = {}
+    cases = (
+        ('single orders group, dumps per socket', False, False),
+        ('scoped groups, dumps per socket', True, False),
+        ('scoped groups, dumps once per event', True, True),
+    )
+    for label, scoped, serialize_once in cases:
+        seconds, deliveries = run(scoped, serialize_once)
+        results[label] = seconds
+        results[f'{label}, deliveries per event'] = {'count': deliveries}
+    return results
+
+
+@benchmark('read_path')
+def bench_read_path(sizes=(100, 1000, 10000)):
+    """Serializer + JSONRenderer against .values() rows + ORJSONRenderer"""
+    from decimal import Decimal
+
+    from django.db.models import Prefetch
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from .models import MenuCategory, MenuItem, Order, OrderItem
+    from .readers import menu_item_rows, order_rows
+    from .renderers import ORJSONRenderer
+    from .serializers import MenuItemSerializer, OrderSerializer
+
+    request = Request(APIRequestFactory().get('/api/'))
+
+    def serializer_path(serializer_class, queryset):
+        data = serializer_class(queryset, many=True, context={'request': request}).data
+        return JSONRenderer().render(data)
+
+    def fast_path(read_rows, queryset):
+        return ORJSONRenderer().render(read_rows(queryset, request))
+
+    results = {}
+    with scratch_database():
+        category = MenuCategory.objects.create(name='Meals')
+        for size in sizes:
+            MenuItem.objects.all().delete()
+            Order.objects.all().delete()
+            menu = MenuItem.objects.bulk_create([
+                MenuItem(category=category, name=f'Dish {i}', description='Freshly made',
+                         price=Decimal('45.50'), image=f'item_images/dish-{i}.png')
+                for i in range(size)
+            ])
+            orders = Order.objects.bulk_create([
+                Order(customer_name=f'Student {i}', customer_phone='9999999999',
+                      total_price=Decimal('91.00'))
+                for i in range(size)
+            ])
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, menu_item=menu[(i + k) % size], quantity=1, subtotal=Decimal('45.50'))
+                for i, order in enumerate(orders) for k in range(2)
+            ])
+
+            number = max(1, 1000 // size)
+            items = MenuItem.objects.select_related('category')
+            results[f'menu items x{size}, serializer'] = per_call(
+                lambda: serializer_path(MenuItemSerializer, items), number, 3)
+            results[f'menu items x{size}, fast path'] = per_call(
+                lambda: fast_path(menu_item_rows, MenuItem.objects.all()), number, 3)
+
+            # Give the serializer its best case: items prefetched up front
+            prefetched = Order.objects.select_related('pickup_slot').prefetch_related(
+                Prefetch('items', queryset=OrderItem.objects.select_related('menu_item')))
+            results[f'orders x{size}, serializer (prefetched)'] = per_call(
+                lambda: serializer_path(OrderSerializer, prefetched), number, 3)
+            results[f'orders x{size}, fast path'] = per_call(
+                lambda: fast_path(order_rows, Order.objects.all()), number, 3)
+    return results
+
+
+@benchmark('orders_table')
+def bench_orders_table(rows=500):
+    """Staff orders table render: every row rendered vs spliced from the row cache"""
+    from decimal import Decimal
+
+    from django.test.utils import override_settings
+
+    from .fragments import get_row_cache, render_orders_table
+    from .models import MenuCategory, MenuItem, Order, OrderItem
+
+    results = {}
+    # A worker-local row cache, so the run never reads or fills a shared alias
+    with scratch_database(), override_settings(ORDERS_TABLE_ROW_CACHE_ALIAS=None):
+        category = MenuCategory.objects.create(name='Meals')
+        dish = MenuItem.objects.create(category=category, name='Thali', price=Decimal('60.00'))
+        orders = Order.objects.bulk_create([
+            Order(customer_name=f'Student {i}', customer_phone='9999999999', total_price=Decimal('120.00'))
+            for i in range(rows)
+        ])
+        OrderItem.objects.bulk_create([OrderItem(order=order, menu_item=dish, quantity=2) for order in orders])
+        table = Order.objects.all().order_by('-created_at')
+        cache = get_row_cache()
+
+        def cold():
+            cache.clear()
+            render_orders_table(table)
+
+        def one_changed():
+            order = orders[rows // 2]
+            order.status = 'preparing' if order.status == 'pending' else 'pending'
+            order.save(update_fields=['status', 'updated_at'])
+            render_orders_table(table)
+
+        results[f'{rows} rows, no cached rows'] = per_call(cold, 5, 3)
+        render_orders_table(table)
+        results[f'{rows} rows, one row changed'] = per_call(one_changed, 20, 3)
+        results[f'{rows} rows, nothing changed'] = per_call(lambda: render_orders_table(table), 20, 3)
+        cache.clear()
+    return results
+
+
+@benchmark('replica')
+def bench_replica(readers=4, checkouts=200, menu_size=200, history=2000):
+    """Checkout latency while menu and order-history reads hammer the primary
+    or the stand-in replica.
+
+    Readers are forked processes, like other web workers, so they compete
+    for the database rather than for this process's GIL.
+    """
+    import multiprocessing
+    import statistics
+    import tempfile
+    from decimal import Decimal
+
+    from django.core.management import call_command
+    from django.db import connection, connections
+    from django.test.utils import override_settings
+
+    from .management.commands.snapshot_replica import snapshot
+    from .models import MenuCategory, MenuItem, Order
+    from .readers import menu_item_rows, order_rows
+    from .routers import use_replica
+    from .serializers import OrderSerializer
+
+    def read_load(stop, on_replica):
+        try:
+            with use_replica(on_replica):
+                # A short pause per request leaves CPU for the writer, as
+                # separate hosts would
+                while not stop.wait(0.005):
+                    menu_item_rows(MenuItem.objects.all(), None)
+                    order_rows(Order.objects.order_by('-created_at')[:20], None)
+        finally:
+            connections.close_all()
+
+    def checkout_latencies(menu):
+        latencies = []
+        for i in range(checkouts):
+            serializer = OrderSerializer(data={
+                'customer_name': 'Bench', 'customer_phone': '9999999999',
+                'items': [{'menu_item': menu[i % len(menu)].id, 'quantity': 1}],
+            })
+            serializer.is_valid(raise_exception=True)
+            start = time.perf_counter()
+            serializer.save()
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    def run(menu, readers, on_replica=False):
+        fork = multiprocessing.get_context('fork')
+        stop = fork.Event()
+        # Children must not inherit this process's open connections
+        connections.close_all()
+        workers = [fork.Process(target=read_load, args=(stop, on_replica)) for _ in range(readers)]
+        for worker in workers:
+            worker.start()
+        try:
+            latencies = checkout_latencies(menu)
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+        return statistics.median(latencies), statistics.quantiles(latencies, n=20)[-1]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, file_database(f'{tmp}/primary.sqlite3'):
+        call_command('migrate', verbosity=0)
+        category = MenuCategory.objects.create(name='Meals')
+        menu = MenuItem.objects.bulk_create([
+            MenuItem(category=category, name=f'Dish {i}', price=Decimal('45.00')) for i in range(menu_size)
+        ])
+        Order.objects.bulk_create([Order(customer_name=f'Student {i}') for i in range(history)])
+        connection.close()
+        snapshot(f'{tmp}/primary.sqlite3', f'{tmp}/replica.sqlite3')
+
+        connections.settings['bench_replica'] = dict(connection.settings_dict, NAME=f'{tmp}/replica.sqlite3')
+        try:
+            with override_settings(REPLICA_DATABASE_ALIAS='bench_replica'):
+                cases = [
+                    ('no read load', 0, False),
+                    (f'{readers} readers on primary', readers, False),
+                    (f'{readers} readers on replica', readers, True),
+                ]
+                for label, processes, on_replica in cases:
+                    median, p95 = run(menu, processes, on_replica)
+                    results[f'checkout, {label} (median)'] = median
+                    results[f'checkout, {label} (p95)'] = p95
+        finally:
+            connections['bench_replica'].close()
+            del connections['bench_replica']
+            del connections.settings['bench_replica']
+    return results
+
+
+@benchmark('checkout')
+def bench_checkout(history=10000):
+    """OrderSerializer.create against a canteen with a term's orders on file"""
+    from django.test.utils import override_settings
+
+    from .factories import seed_menu, seed_orders
+    from .serializers import OrderSerializer
+
+    results = {}
+    # Slots big enough never to fill, so every checkout takes the same path
+    with scratch_database(), override_settings(PICKUP_SLOT_CAPACITY=10 ** 9):
+        menu = seed_menu()
+        seed_orders(history, menu)
+        for size in (1, 3):
+            payload = {'customer_name': 'Asha', 'customer_phone': '9999999999',
+                       'items': [{'menu_item': item.id, 'quantity': 1} for item in menu[:size]]}
+
+            def checkout():
+                serializer = OrderSerializer(data=payload)
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+            results[f'OrderSerializer.create, {size} item(s)'] = measure(checkout, 50, 3)
+    return results
+
+
+@benchmark('order_views')
+def bench_order_views(sizes=(1000, 10000), table_size=1000):
+    """OrderViewSet.list and .table over seeded order histories"""
+    from django.test.utils import override_settings
+    from rest_framework.test import APIRequestFactory
+
+    from .factories import seed_menu, seed_orders
+    from .fragments import get_row_cache
+    from .models import Order
+    from .views import OrderViewSet
+
+    factory = APIRequestFactory()
+    list_view = OrderViewSet.as_view({'get': 'list'})
+    table_view = OrderViewSet.as_view({'get': 'table'})
+
+    def get_list():
+        return list_view(factory.get('/api/orders/')).render()
+
+    def get_table(**headers):
+        return table_view(factory.get('/api/orders/table/', **headers))
+
+    def cold_table():
+        get_row_cache().clear()
+        return get_table()
+
+    results = {}
+    # A worker-local row cache, so the run never reads or fills a shared alias
+    with scratch_database(), override_settings(ORDERS_TABLE_ROW_CACHE_ALIAS=None):
+        menu = seed_menu()
+        for size in sorted(set(sizes) | {table_size}):
+            seed_orders(size - Order.objects.count(), menu, seed=size)
+            number = max(1, 2000 // size)
+            if size in sizes:
+                results[f'list x{size}'] = measure(get_list, number, 3)
+            if size == table_size:
+                results[f'table x{size}, no cached rows'] = measure(cold_table, number, 3)
+                etag = get_table()['ETag']
+                results[f'table x{size}, rows cached'] = measure(get_table, number, 3)
+                results[f'table x{size}, unchanged (304)'] = measure(
+                    lambda: get_table(HTTP_IF_NONE_MATCH=etag), 100, 3)
+        get_row_cache().clear()
+    return results
+
+
+@benchmark('menu_nesting')
+def bench_menu_nesting(categories=8, items_per_category=25):
+    """MenuCategorySerializer with nested items against the row reader"""
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from .factories import seed_menu
+    from .models import MenuCategory
+    from .readers import menu_category_rows
+    from .serializers import MenuCategorySerializer
+
+    request = Request(APIRequestFactory().get('/api/categories/'))
+
+    def nested(queryset):
+        return lambda: MenuCategorySerializer(queryset, many=True, context={'request': request}).data
+
+    results = {}
+    with scratch_database():
+        seed_menu(categories, items_per_category)
+        label = f'{categories} categories x {items_per_category} items'
+        results[f'{label}, serializer'] = measure(nested(MenuCategory.objects.all()), 20, 3)
+        results[f'{label}, serializer (prefetched)'] = measure(
+            nested(MenuCategory.objects.prefetch_related('items__category')), 20, 3)
+        results[f'{label}, row reader'] = measure(
+            lambda: menu_category_rows(MenuCategory.objects.all(), request), 20, 3)
+    return results
+
+
+@benchmark('login')
+def bench_login():
+    """login_view end to end; dominated by the password hasher by design"""
+    from django.conf import settings
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from .factories import seed_students
+    from .throttling import get_store
+
+    rates = {scope: f'{10 ** 9}/s' for scope in settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']}
+    client = Client()
+
+    def login(email, password):
+        return lambda: client.post('/api/auth/login/', {'email': email, 'password': password},
+                                   content_type='application/json')
+
+    results = {}
+    with scratch_database(), override_settings(
+            REST_FRAMEWORK=dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES=rates), THROTTLE_STORE='memory'):
+        get_store().clear()
+        [student] = seed_students(1)
+        results['login_view, valid password'] = measure(login(student.email, 'benchmark-pass'), 3, 3)
+        results['login_view, wrong password'] = measure(login(student.email, 'wrong-pass'), 3, 3)
+        results['login_view, malformed email'] = measure(login('someone@gmail.com', 'benchmark-pass'), 100, 3)
+    return results
+
+
+@benchmark('student_email')
+def bench_student_email():
+    from authentication.views import is_student_email
+
+    results = {}
+    for label, email in (('student', '2021cs1234@iiitkota.ac.in'),
+                         ('staff address', 'john.doe@iiitkota.ac.in'),
+                         ('other domain', 'someone@gmail.com')):
+        results[f'is_student_email, {label}'] = per_call(lambda email=email: is_student_email(email))
+    return results
+
+
+@benchmark('consumer')
+def bench_consumer(burst=50):
+    """OrderConsumer send path: queue, batch and send frames, plus the
+    once-per-event serialisation in broadcast_order"""
+    import asyncio
+    import json
+
+    from .consumers import OrderConsumer
+    from .factories import seed_menu, seed_orders
+    from .models import Order
+    from .serializers import OrderSerializer
+
+    async def send(text_data=None, bytes_data=None):
+        pass
+
+    consumer = OrderConsumer()
+    consumer.batch_interval = 0
+    consumer.send = send
+    loop = asyncio.new_event_loop()
+    text = json.dumps({'type': 'order_update', 'data': {'id': 1, 'status': 'ready'}})
+
+    async def deliver(events):
+        for _ in range(events):
+            await consumer.queue_frame(text)
+        await consumer.flush_task
+
+    results = {}
+    try:
+        results['queue + flush, one event'] = per_call(lambda: loop.run_until_complete(deliver(1)), 2000, 5)
+        results[f'queue + flush, burst of {burst} (one batch frame)'] = per_call(
+            lambda: loop.run_until_complete(deliver(burst)), 200, 5)
+    finally:
+        loop.close()
+
+    with scratch_database():
+        seed_orders(1, seed_menu(1, 3))
+        order = Order.objects.get()
+        results['broadcast_order payload'] = measure(
+            lambda: json.dumps({'type': 'order_update', 'data': OrderSerializer(order).data}), 500, 3)
+    return results
+
+
+@benchmark('status_update')
+def bench_status_update():
+    """Staff PATCH of an order's status, including the queued notifications"""
+    from rest_framework.test import APIRequestFactory
+
+    from .factories import seed_menu, seed_orders
+    from .views import OrderViewSet
+
+    factory = APIRequestFactory()
+    view = OrderViewSet.as_view({'patch': 'partial_update'})
+    statuses = iter(['preparing', 'ready'] * 10 ** 6)
+
+    results = {}
+    with scratch_database():
+        [order] = seed_orders(1, seed_menu(1, 3))
+        order.customer_email = 'asha@example.com'
+        order.save()
+
+        def patch():
+            request = factory.patch(f'/api/orders/{order.id}/', {'status': next(statuses)}, format='json')
+            return view(request, pk=order.id).render()
+        # Every other call marks the order ready and queues its email and SMS
+        results['partial_update, preparing <-> ready'] = measure(patch, 100, 3)
+    return results
@@ -0,0 +1,86 @@
+"""Publishing order events to the ``ws/orders/`` channel groups.
+
+Every event goes to a handful of groups, so each socket only receives what
+it subscribed to:
+
+* ``orders``                               - staff screens watching every order
+* ``orders.status.<status>``               - staff screens filtered to some statuses
+* ``orders.outlet.<id>``                   - one counter's staff screens
+* ``orders.outlet.<id>.status.<status>``   - one counter, filtered to some statuses
+* ``order.<id>``                           - a student tracking one order
+"""
+import json
+import logging
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+STAFF_GROUP = 'orders'
+# How many recent order ids a session may track without being signed in
+TRACKED_ORDERS_LIMIT = 20
+
+
+def outlet_group(outlet_id):
+    return f'orders.outlet.{outlet_id}'
+
+
+def feed_group(outlet_id=None):
+    """The unfiltered staff feed, for every counter or just one"""
+    return STAFF_GROUP if outlet_id is None else outlet_group(outlet_id)
+
+
+def status_group(status, outlet_id=None):
+    return f'{feed_group(outlet_id)}.status.{status}'
+
+
+def order_group(order_id):
+    return f'order.{order_id}'
+
+
+def order_groups(order, previous_status=None):
+    statuses = [order.status]
+    # Screens filtered on the old status need to see the order leave
+    if previous_status and previous_status != order.status:
+        statuses.append(previous_status)
+
+    groups = [STAFF_GROUP, order_group(order.id)] + [status_group(status) for status in statuses]
+    if order.outlet_id is not None:
+        groups.append(outlet_group(order.outlet_id))
+        groups += [status_group(status, order.outlet_id) for status in statuses]
+    return groups
+
+
+def broadcast_order(order, event_type, previous_status=None, data=None):
+    """Send ``order`` to every group interested in it; pass ``data`` when the
+    caller has already serialised it"""
+    from .serializers import OrderSerializer
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    if data is None:
+        data = OrderSerializer(order).data
+    # Serialised once here; consumers forward the text as-is
+    text = json.dumps({'type': event_type, 'data': data})
+    # A socket in several of the groups gets one copy per group; the id lets
+    # it drop the repeats
+    message = {'type': event_type, 'text': text, 'event_id': uuid.uuid4().hex}
+
+    async def send_to_groups(groups):
+        for group in groups:
+            await channel_layer.group_send(group, message)
+    try:
+        # One hop into the event loop per event, not one per group
+        async_to_sync(send_to_groups)(order_groups(order, previous_status))
+    except Exception:
+        # Live updates are best effort; polling still picks the change up
+        logger.exception("Failed to broadcast %s for order %s", event_type, order.id)
+
+
+def remember_order(session, order_id):
+    """Let this session subscribe to ``order_id`` without an account"""
+    tracked = session.get('tracked_orders', [])
+    session['tracked_orders'] = (tracked + [order_id])[-TRACKED_ORDERS_LIMIT:]
@@ -1,52 +1,247 @@
 # canteen/consumers.py
+import asyncio
 import json
+from collections import deque
+from urllib.parse import parse_qs
+
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.contrib.auth.models import AnonymousUser
+from django.conf import settings
+
+from .broadcast import STAFF_GROUP, feed_group, order_group, status_group
+from .metrics import metrics
+from .models import Order
+
+STATUSES = {value for value, _ in Order.STATUS_CHOICES}
+RESYNC_FRAME = json.dumps({'type': 'resync'})
+# Event ids remembered per socket; repeats of one event arrive back to back
+RECENT_EVENTS = 64
+
 
 class OrderConsumer(AsyncWebsocketConsumer):
+    """Live order events for staff screens and students tracking an order.
+
+    Sockets with a staff session start on the all-orders feed, or on one
+    counter's feed when they connect to ``ws/orders/?outlet=<id>``; everyone
+    else only receives the orders they subscribe to. Clients narrow what they
+    receive by sending JSON messages:
+
+    * ``{"action": "subscribe", "order": 12}``      track one order
+    * ``{"action": "unsubscribe", "order": 12}``
+    * ``{"action": "filter", "statuses": ["pending", "preparing"]}``
+      staff only; an empty list goes back to every order
+    * ``{"action": "ack", "received": 42}``          frames handled so far
+
+    Events are not sent one frame each: they are buffered per connection and
+    flushed every ``ORDERS_WS_BATCH_INTERVAL`` seconds, as the event itself
+    when only one arrived or as ``{"type": "batch", "events": [...]}``.
+
+    The server cannot see how far behind a client is, so clients that want
+    flow control ack the number of frames they have handled (starting with
+    ``"received": 0`` when they connect). Once ``ORDERS_WS_MAX_UNACKED``
+    frames are unacknowledged, events wait in the buffer instead of being
+    sent; if more than ``ORDERS_WS_MAX_PENDING`` pile up there, the buffer is
+    dropped and a single ``{"type": "resync"}`` frame, sent after the next
+    ack, tells the client to reload instead. For clients that never ack,
+    ``ORDERS_WS_MAX_PENDING`` only caps how many events one flush may carry.
+    """
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.room_group_name = 'orders'
-        
+        self.groups_joined = set()
+        self.batch_interval = getattr(settings, 'ORDERS_WS_BATCH_INTERVAL', 0.05)
+        self.max_pending = getattr(settings, 'ORDERS_WS_MAX_PENDING', 100)
+        self.max_unacked = getattr(settings, 'ORDERS_WS_MAX_UNACKED', 10)
+        self.frames_sent = 0
+        # None until the client acks for the first time
+        self.frames_acked = None
+        self.pending = []
+        self.resync_pending = False
+        self.flush_task = None
+        self.outlet_id = None
+        self.recent_events = deque(maxlen=RECENT_EVENTS)
+
     async def connect(self):
-        # For now, allow all connections to test functionality
-        # In production, you might want to check authentication
-        # if self.scope["user"] == AnonymousUser() or not self.scope["user"].is_staff:
-        #     await self.close()
-        #     return
-        
-        # Join room group
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
-        )
-        
         await self.accept()
+        outlet = parse_qs(self.scope.get('query_string', b'').decode()).get('outlet', [''])[0]
+        if outlet:
+            if not outlet.isdigit():
+                await self.send_error('"outlet" must be an outlet id')
+                await self.close()
+                return
+            self.outlet_id = int(outlet)
+        if self.is_staff_socket():
+            await self.join(feed_group(self.outlet_id))
 
     async def disconnect(self, close_code):
-        # Leave room group only if we joined it
-        if hasattr(self, 'room_group_name'):
-            await self.channel_layer.group_discard(
-                self.room_group_name,
-                self.channel_name
-            )
+        for group in list(self.groups_joined):
+            await self.leave(group)
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+        metrics.incr('ws.queue_depth', -len(self.pending))
+        self.pending = []
+
+    def is_staff_socket(self):
+        # The feed carries customer names and contact details
+        user = self.scope.get('user')
+        return bool(user and user.is_authenticated and (user.is_staff or user.is_superuser))
+
+    async def join(self, group):
+        if group not in self.groups_joined:
+            await self.channel_layer.group_add(group, self.channel_name)
+            self.groups_joined.add(group)
+
+    async def leave(self, group):
+        if group in self.groups_joined:
+            await self.channel_layer.group_discard(group, self.channel_name)
+            self.groups_joined.discard(group)
+
+    async def leave_feeds(self):
+        for group in list(self.groups_joined):
+            if group == STAFF_GROUP or group.startswith('orders.'):
+                await self.leave(group)
 
     # Receive message from WebSocket
-    async def receive(self, text_data):
-        pass  # We don't expect messages from client for now
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            message = json.loads(text_data or '')
+            action = message['action']
+        except (ValueError, TypeError, KeyError):
+            await self.send_error('Expected a JSON object with an "action"')
+            return
+
+        if action == 'subscribe':
+            await self.subscribe(message.get('order'))
+        elif action == 'unsubscribe':
+            await self.leave(order_group(message.get('order')))
+        elif action == 'filter':
+            await self.filter_statuses(message.get('statuses') or [])
+        elif action == 'ack':
+            await self.ack(message.get('received'))
+        else:
+            await self.send_error(f'Unknown action "{action}"')
+
+    async def subscribe(self, order_id):
+        try:
+            order_id = int(order_id)
+        except (TypeError, ValueError):
+            await self.send_error('"order" must be an order id')
+            return
+
+        if not await self.may_track(order_id):
+            await self.send_error('Order not found')
+            return
+
+        await self.join(order_group(order_id))
+        await self.send(text_data=json.dumps({'type': 'subscribed', 'order': order_id}))
+
+    async def filter_statuses(self, statuses):
+        if not self.is_staff_socket():
+            await self.send_error('Only staff can filter the order feed')
+            return
+        if not isinstance(statuses, list) or not all(isinstance(status, str) for status in statuses):
+            await self.send_error('"statuses" must be a list of statuses')
+            return
+        unknown = set(statuses) - STATUSES
+        if unknown:
+            await self.send_error(f"Unknown status(es): {', '.join(sorted(unknown))}")
+            return
+
+        await self.leave_feeds()
+        if statuses:
+            for status in statuses:
+                await self.join(status_group(status, self.outlet_id))
+        else:
+            await self.join(feed_group(self.outlet_id))
+        await self.send(text_data=json.dumps({'type': 'filtered', 'statuses': sorted(statuses)}))
+
+    @database_sync_to_async
+    def may_track(self, order_id):
+        user = self.scope.get('user')
+        if user is not None and (user.is_staff or user.is_superuser):
+            return Order.objects.filter(pk=order_id).exists()
+        session = self.scope.get('session')
+        if session is not None and order_id in session.get('tracked_orders', []):
+            return True
+        if user is not None and user.is_authenticated:
+            return Order.objects.filter(pk=order_id, user=user).exists()
+        return False
+
+    async def ack(self, received):
+        try:
+            received = int(received)
+        except (TypeError, ValueError):
+            await self.send_error('"received" must be a frame count')
+            return
+        self.frames_acked = max(self.frames_acked or 0, min(received, self.frames_sent))
+        if (self.pending or self.resync_pending) and self.flush_task is None and not self.window_full():
+            self.flush_task = asyncio.ensure_future(self.flush())
+
+    def window_full(self):
+        """Whether the client is too far behind on acks to send it more"""
+        return self.frames_acked is not None and self.frames_sent - self.frames_acked >= self.max_unacked
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        if text_data is not None or bytes_data is not None:
+            self.frames_sent += 1
+        await super().send(text_data, bytes_data, close)
+
+    async def send_error(self, error):
+        await self.send(text_data=json.dumps({'type': 'error', 'error': error}))
 
     # Receive message from room group
     async def order_update(self, event):
-        # Send message to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'order_update',
-            'data': event['data']
-        }))
-        
+        await self.queue_frame(event['text'], event.get('event_id'))
+
     async def new_order(self, event):
-        # Send new order notification to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'new_order',
-            'data': event['data']
-        }))
+        await self.queue_frame(event['text'], event.get('event_id'))
+
+    async def queue_frame(self, text, event_id=None):
+        if event_id is not None:
+            # The same event comes once per group this socket shares with the
+            # order (feed and status group, feed and order group); send it once
+            if event_id in self.recent_events:
+                metrics.incr('ws.duplicates_dropped')
+                return
+            self.recent_events.append(event_id)
+
+        if self.resync_pending:
+            # The client reloads everything on resync, so nothing is lost
+            metrics.incr('ws.frames_dropped')
+        elif len(self.pending) >= self.max_pending and (self.frames_acked is None or self.window_full()):
+            metrics.incr('ws.frames_dropped', len(self.pending) + 1)
+            metrics.incr('ws.queue_depth', -len(self.pending))
+            metrics.incr('ws.resyncs')
+            self.pending = []
+            self.resync_pending = True
+        else:
+            self.pending.append(text)
+            metrics.incr('ws.queue_depth')
+            metrics.max('ws.queue_depth_max', len(self.pending))
+
+        if self.flush_task is None and not self.window_full():
+            self.flush_task = asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        try:
+            while self.pending or self.resync_pending:
+                await asyncio.sleep(self.batch_interval)
+                if self.window_full():
+                    # Keep buffering; the client's next ack restarts the flush
+                    return
+                frames, self.pending = self.pending, []
+                metrics.incr('ws.queue_depth', -len(frames))
+                if self.resync_pending:
+                    self.resync_pending = False
+                    text = RESYNC_FRAME
+                elif len(frames) == 1:
+                    text = frames[0]
+                elif frames:
+                    text = '{"type": "batch", "events": [' + ', '.join(frames) + ']}'
+                else:
+                    continue
+                metrics.incr('ws.frames_sent')
+                metrics.incr('ws.events_sent', len(frames))
+                await self.send(text_data=text)
+        finally:
+            self.flush_task = None
@@ -0,0 +1,93 @@
+"""Seed realistic menus, students and order histories in bulk.
+
+For benchmarks and load tests: everything goes through ``bulk_create`` so
+100k orders take seconds, and a fixed ``seed`` makes runs repeatable.
+"""
+import datetime
+import random
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .models import MenuCategory, MenuItem, Order, OrderItem
+
+CATEGORIES = ['Snacks', 'Meals', 'South Indian', 'Chinese', 'Beverages', 'Desserts', 'Breakfast', 'Rolls']
+DISHES = ['Samosa', 'Thali', 'Masala Dosa', 'Hakka Noodles', 'Masala Chai', 'Gulab Jamun', 'Poha',
+          'Paneer Roll', 'Biryani', 'Idli', 'Cold Coffee', 'Veg Puff', 'Chole Bhature', 'Momos']
+# Roughly how a day's orders end up
+STATUS_WEIGHTS = {'completed': 85, 'cancelled': 5, 'ready': 3, 'preparing': 3, 'pending': 4}
+
+
+@contextmanager
+def historical_timestamps():
+    """Let ``bulk_create`` keep the ``created_at``/``updated_at`` it is given"""
+    fields = [Order._meta.get_field('created_at'), Order._meta.get_field('updated_at')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def seed_menu(categories=6, items_per_category=10, outlet=None, seed=0):
+    """Create a menu; returns its items"""
+    rng = random.Random(seed)
+    suffix = f' ({outlet.slug})' if outlet is not None else ''
+    created = MenuCategory.objects.bulk_create([
+        MenuCategory(outlet=outlet, name=f'{CATEGORIES[i % len(CATEGORIES)]} {i}{suffix}',
+                     description='Freshly made')
+        for i in range(categories)
+    ])
+    return MenuItem.objects.bulk_create([
+        MenuItem(category=category, outlet=outlet,
+                 name=f'{DISHES[(i * items_per_category + j) % len(DISHES)]} {j}',
+                 description='House special', price=Decimal(rng.randrange(10, 150)),
+                 image=f'item_images/dish-{i}-{j}.png')
+        for i, category in enumerate(created) for j in range(items_per_category)
+    ])
+
+
+def seed_students(count, password='benchmark-pass'):
+    """Student accounts with real password hashes (hashed once, shared)"""
+    password = make_password(password)
+    return User.objects.bulk_create([
+        User(username=f'2024bm{i:04d}@iiitkota.ac.in', email=f'2024bm{i:04d}@iiitkota.ac.in', password=password)
+        for i in range(count)
+    ])
+
+
+def seed_orders(count, menu, days=90, users=(), outlet=None, seed=0, batch_size=5000):
+    """``count`` orders of 1-3 items spread over the last ``days`` days"""
+    rng = random.Random(seed)
+    now = timezone.now()
+    statuses = rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()), k=count)
+    times = sorted(now - datetime.timedelta(seconds=rng.randrange(days * 86400)) for _ in range(count))
+
+    orders = []
+    lines = []
+    for i in range(count):
+        picks = [(rng.choice(menu), rng.randint(1, 2)) for _ in range(rng.randint(1, 3))]
+        orders.append(Order(
+            outlet=outlet, user=rng.choice(users) if users else None,
+            customer_name=f'Student {i}', customer_phone=f'9{i:09d}',
+            status=statuses[i], payment_method=rng.choice(['cash', 'upi', 'card']),
+            total_price=sum(item.price * quantity for item, quantity in picks),
+            prep_units=sum(quantity for _, quantity in picks),
+            created_at=times[i], updated_at=times[i],
+        ))
+        lines.append(picks)
+
+    with historical_timestamps():
+        orders = Order.objects.bulk_create(orders, batch_size=batch_size)
+    OrderItem.objects.bulk_create(
+        (OrderItem(order=order, menu_item=item, quantity=quantity, subtotal=item.price * quantity)
+         for order, picks in zip(orders, lines) for item, quantity in picks),
+        batch_size=batch_size,
+    )
+    return orders
@@ -0,0 +1,120 @@
+"""Demand forecasts per menu item and 15-minute slot, for prep planning.
+
+Order history is loaded once into a ``(items, days, slots)`` NumPy array of
+quantities; every forecast is then computed for the whole menu at once:
+
+* seasonal naive  - the same slot on the last same weekday
+* smoothed        - simple exponential smoothing over all past same weekdays
+"""
+import datetime
+
+import numpy as np
+from django.utils import timezone
+
+from .models import MenuItem, OrderItem
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def load_history(start, end):
+    """Return ``(menu_item_ids, local_seconds, quantities)`` arrays for items
+    ordered in ``[start, end)``, cancelled orders excluded"""
+    rows = list(
+        OrderItem.objects
+        .filter(order__created_at__gte=start, order__created_at__lt=end)
+        .exclude(order__status='cancelled')
+        .values_list('menu_item_id', 'order__created_at', 'quantity')
+    )
+    if not rows:
+        return np.empty(0, np.int64), np.empty(0, np.float64), np.empty(0, np.float64)
+
+    item_ids, created, quantities = zip(*rows)
+    # One offset for the whole window: fine for zones without DST
+    offset = timezone.localtime(end).utcoffset().total_seconds()
+    seconds = np.fromiter((dt.timestamp() for dt in created), np.float64, len(created)) + offset
+    return np.asarray(item_ids, np.int64), seconds, np.asarray(quantities, np.float64)
+
+
+def demand_cube(item_ids, seconds, quantities, first_day, days):
+    """Sum quantities into a ``(items, days, slots)`` array.
+
+    Returns ``(menu_item_ids, cube)``; row ``i`` of the cube belongs to
+    ``menu_item_ids[i]``.
+    """
+    menu_item_ids, item_index = np.unique(item_ids, return_inverse=True)
+    epoch = datetime.datetime.combine(first_day, datetime.time(), datetime.timezone.utc).timestamp()
+    elapsed = seconds - epoch
+    day_index = (elapsed // 86400).astype(np.int64)
+    slot_index = ((elapsed % 86400) // (SLOT_MINUTES * 60)).astype(np.int64)
+
+    in_window = (day_index >= 0) & (day_index < days)
+    flat = (item_index * days + day_index) * SLOTS_PER_DAY + slot_index
+    cube = np.bincount(
+        flat[in_window], weights=quantities[in_window],
+        minlength=len(menu_item_ids) * days * SLOTS_PER_DAY,
+    )
+    return menu_item_ids, cube.reshape(len(menu_item_ids), days, SLOTS_PER_DAY)
+
+
+def smoothing_weights(count, alpha):
+    """Weights that turn ``count`` observations into their final exponentially
+    smoothed level (initialised with the first observation)"""
+    weights = alpha * (1 - alpha) ** np.arange(count - 1, -1, -1, dtype=np.float64)
+    if count:
+        weights[0] = (1 - alpha) ** (count - 1)
+    return weights
+
+
+def forecast_cube(cube, first_day, target_date, alpha=0.3):
+    """Seasonal-naive and smoothed ``(items, slots)`` forecasts for ``target_date``"""
+    days = cube.shape[1]
+    weekdays = (first_day.weekday() + np.arange(days)) % 7
+    same_weekday = cube[:, weekdays == target_date.weekday(), :]
+    if same_weekday.shape[1] == 0:
+        empty = np.zeros((cube.shape[0], SLOTS_PER_DAY))
+        return empty, empty
+    seasonal_naive = same_weekday[:, -1, :]
+    smoothed = np.tensordot(same_weekday, smoothing_weights(same_weekday.shape[1], alpha), axes=([1], [0]))
+    return seasonal_naive, smoothed
+
+
+def forecast_demand(target_date=None, history_days=365, alpha=0.3):
+    """Forecast every menu item's demand per slot on ``target_date`` (default
+    tomorrow) from the preceding ``history_days`` days of orders"""
+    if target_date is None:
+        target_date = timezone.localdate() + datetime.timedelta(days=1)
+    first_day = target_date - datetime.timedelta(days=history_days)
+    tz = timezone.get_current_timezone()
+    start = datetime.datetime.combine(first_day, datetime.time(), tz)
+    end = datetime.datetime.combine(target_date, datetime.time(), tz)
+
+    menu_item_ids, cube = demand_cube(*load_history(start, end), first_day, history_days)
+    seasonal_naive, smoothed = forecast_cube(cube, first_day, target_date, alpha)
+
+    names = dict(MenuItem.objects.filter(pk__in=menu_item_ids.tolist()).values_list('id', 'name'))
+    items = []
+    for row, menu_item_id in enumerate(menu_item_ids.tolist()):
+        busy = np.flatnonzero(seasonal_naive[row] + smoothed[row])
+        items.append({
+            'menu_item': menu_item_id,
+            'name': names.get(menu_item_id),
+            'seasonal_naive_total': float(seasonal_naive[row].sum()),
+            'smoothed_total': round(float(smoothed[row].sum()), 2),
+            'slots': [
+                {
+                    'time': f'{slot * SLOT_MINUTES // 60:02d}:{slot * SLOT_MINUTES % 60:02d}',
+                    'seasonal_naive': float(seasonal_naive[row, slot]),
+                    'smoothed': round(float(smoothed[row, slot]), 2),
+                }
+                for slot in busy.tolist()
+            ],
+        })
+    items.sort(key=lambda item: item['smoothed_total'], reverse=True)
+    return {
+        'date': target_date.isoformat(),
+        'history_days': history_days,
+        'alpha': alpha,
+        'slot_minutes': SLOT_MINUTES,
+        'items': items,
+    }
@@ -0,0 +1,104 @@
+"""Per-row fragment cache for the staff orders table.
+
+A table render re-renders only the orders whose row would look different
+and splices every other row in from cached HTML. Rows are keyed by order id
+plus everything the row shows that can change (``updated_at`` and the item
+count), so an edited order simply misses the cache and stale rows age out.
+
+Rendered rows live in a bounded in-process LRU. Set
+``ORDERS_TABLE_ROW_CACHE_ALIAS`` to a ``CACHES`` alias to also share them
+between workers; the LRU still answers first.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db.models import Count
+from django.dispatch import receiver
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+from .caching import LRUCache
+from .metrics import metrics
+from .models import Order
+
+# Bump when orders_table_row.html changes so shared caches drop old markup
+ROW_TEMPLATE_VERSION = 1
+
+
+class RowCache:
+    def __init__(self, maxsize=5000, alias=None):
+        self.local = LRUCache(maxsize=maxsize)
+        self.shared = caches[alias] if alias else None
+
+    def get_many(self, keys):
+        found = {}
+        missing = []
+        for key in keys:
+            html = self.local.get(key)
+            if html is None:
+                missing.append(key)
+            else:
+                found[key] = html
+        if missing and self.shared is not None:
+            for key, html in self.shared.get_many(missing).items():
+                self.local.set(key, html)
+                found[key] = html
+        return found
+
+    def set_many(self, rows):
+        for key, html in rows.items():
+            self.local.set(key, html)
+        if rows and self.shared is not None:
+            self.shared.set_many(rows)
+
+    def clear(self):
+        # Only this worker's LRU: the shared alias may hold other data, and
+        # shared rows are keyed by what they show, so they never go stale
+        self.local.clear()
+
+
+_cache = None
+
+
+def get_row_cache():
+    global _cache
+    if _cache is None:
+        _cache = RowCache(
+            getattr(settings, 'ORDERS_TABLE_ROW_CACHE_SIZE', 5000),
+            getattr(settings, 'ORDERS_TABLE_ROW_CACHE_ALIAS', None),
+        )
+    return _cache
+
+
+@receiver(setting_changed)
+def _reset_cache(*, setting, **kwargs):
+    global _cache
+    if setting in ('ORDERS_TABLE_ROW_CACHE_SIZE', 'ORDERS_TABLE_ROW_CACHE_ALIAS', 'CACHES'):
+        _cache = None
+
+
+def row_key(order):
+    return f'orders_table_row:v{ROW_TEMPLATE_VERSION}:{order.id}:{order.updated_at.timestamp()}:{order.item_count}'
+
+
+def render_rows(orders):
+    """Row HTML for ``orders`` in order, rendering only cache misses"""
+    orders = list(orders.annotate(item_count=Count('items')))
+    keys = [row_key(order) for order in orders]
+    cache = get_row_cache()
+    cached = cache.get_many(keys)
+
+    rendered = {}
+    template = get_template('orders_table_row.html')
+    for key, order in zip(keys, orders):
+        if key not in cached:
+            rendered[key] = template.render({'order': order, 'status_choices': Order.STATUS_CHOICES})
+    cache.set_many(rendered)
+
+    metrics.incr('orders_table.row_hits', len(keys) - len(rendered))
+    metrics.incr('orders_table.row_misses', len(rendered))
+    return [mark_safe(cached.get(key) or rendered[key]) for key in keys]
+
+
+def render_orders_table(orders):
+    return render_to_string('orders_table.html', {'rows': render_rows(orders)})
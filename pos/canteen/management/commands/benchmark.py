@@ -0,0 +1,66 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from canteen.benchmarks import BENCHMARKS, as_record, find_regressions
+
+
+class Command(BaseCommand):
+    help = 'Run canteen micro-benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Benchmarks to run (default: all)')
+        parser.add_argument('--list', action='store_true', help='List available benchmarks')
+        parser.add_argument('--record', metavar='PATH',
+                            help='Save the results to a JSON baseline (merged with what is there)')
+        parser.add_argument('--check', metavar='PATH',
+                            help='Fail if a case regressed against this JSON baseline')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed slowdown for --check, as a fraction (default: 0.25)')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name in sorted(BENCHMARKS):
+                self.stdout.write(name)
+            return
+
+        names = options['names'] or sorted(BENCHMARKS)
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            raise CommandError(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+        baseline = {}
+        if options['check']:
+            try:
+                baseline = json.loads(Path(options['check']).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline {options['check']}: {exc}")
+
+        results = {}
+        for name in names:
+            self.stdout.write(f"=== {name} ===")
+            # Time what production runs: DEBUG logs every query
+            with override_settings(DEBUG=False):
+                results[name] = {label: as_record(result) for label, result in BENCHMARKS[name]().items()}
+            for label, record in results[name].items():
+                if 'seconds' in record:
+                    value = f"{record['seconds'] * 1e6:12.2f} µs"
+                else:
+                    value = f"{record['count']:12g}   "
+                queries = f"{record['queries']:5d} queries" if 'queries' in record else ''
+                self.stdout.write(f"  {label:<50} {value} {queries}")
+
+        if options['record']:
+            path = Path(options['record'])
+            recorded = json.loads(path.read_text()) if path.exists() else {}
+            recorded.update(results)
+            path.write_text(json.dumps(recorded, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(f"Recorded {len(results)} benchmark(s) to {path}")
+
+        if options['check']:
+            regressions = find_regressions(baseline, results, options['threshold'])
+            if regressions:
+                raise CommandError('Performance regressions:\n  ' + '\n  '.join(regressions))
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['check']}"))
@@ -0,0 +1,20 @@
+from canteen.models import Notification
+from canteen.notifications import NotificationWorker, record_queue_depth
+from canteen.queueing import QueueWorkerCommand
+
+
+class Command(QueueWorkerCommand):
+    help = 'Send queued order-ready emails and SMS'
+    lane_name = 'channel'
+    batch_size_help = 'Notifications sent per connection'
+    poll_setting = 'NOTIFY_POLL_INTERVAL'
+
+    def get_worker(self, workers, batch_size):
+        return NotificationWorker(workers, batch_size)
+
+    def queue_depths(self):
+        depths = record_queue_depth()
+        return [(name, depths.get(name, 0)) for name, _ in Notification.CHANNEL_CHOICES]
+
+    def report(self, done):
+        self.stdout.write(f"Sent {done} notification(s)")
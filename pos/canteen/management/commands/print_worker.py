@@ -0,0 +1,21 @@
+from django.conf import settings
+
+from canteen.printing import PrintWorker, record_queue_depth
+from canteen.queueing import QueueWorkerCommand
+
+
+class Command(QueueWorkerCommand):
+    help = 'Render queued kitchen tickets and receipts and send them to the printers'
+    lane_name = 'printer'
+    batch_size_help = 'Jobs sent per printer connection'
+    poll_setting = 'PRINT_POLL_INTERVAL'
+
+    def get_worker(self, workers, batch_size):
+        return PrintWorker(workers, batch_size)
+
+    def queue_depths(self):
+        depths = record_queue_depth()
+        return [(name, depths.get(name, 0)) for name in settings.PRINTERS]
+
+    def report(self, done):
+        self.stdout.write(f"Printed {done} job(s)")
@@ -0,0 +1,36 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from canteen.startup import profile_startup
+
+
+class Command(BaseCommand):
+    help = 'Report cold-start import and app-ready times for a worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', default='pos.asgi', help='Module a worker imports (default: pos.asgi)')
+        parser.add_argument('--top', type=int, default=20, help='How many modules/packages to list')
+
+    def handle(self, *args, **options):
+        profile = profile_startup(options['target'])
+        phases, modules = profile['phases'], profile['modules']
+
+        self.stdout.write(f"=== Cold start of {options['target']} ===")
+        for phase in ('settings', 'apps_ready', 'import_target', 'total'):
+            self.stdout.write(f"  {phase:<16} {phases[phase] * 1000:8.1f} ms")
+
+        # Only top-level imports, so nested modules are not counted twice
+        packages = defaultdict(float)
+        for name, _, cumulative, depth in modules:
+            if depth == 0:
+                packages[name.split('.')[0]] += cumulative
+        self.stdout.write("\n=== Cumulative import time by top-level package ===")
+        for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f"  {package:<40} {seconds * 1000:8.1f} ms")
+
+        self.stdout.write("\n=== Slowest modules (self time) ===")
+        for name, self_time, cumulative, _ in sorted(modules, key=lambda module: -module[1])[:options['top']]:
+            self.stdout.write(f"  {name:<50} {self_time * 1000:8.1f} ms  (cumulative {cumulative * 1000:.1f} ms)")
+
+        self.stdout.write(self.style.SUCCESS(f"\n{len(modules)} modules imported"))
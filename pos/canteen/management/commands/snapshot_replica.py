@@ -0,0 +1,41 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Copy the SQLite primary to the local stand-in read replica (REPLICA_DATABASE_PATH)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            help='Keep copying every this many seconds instead of once')
+
+    def handle(self, *args, **options):
+        alias = getattr(settings, 'REPLICA_DATABASE_ALIAS', None)
+        if alias not in connections.settings:
+            raise CommandError('No replica configured; set REPLICA_DATABASE_PATH')
+        primary = connections.settings['default']
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('The stand-in replica can only copy a SQLite primary')
+        # The replica alias opens the file read-only; write through its plain path
+        target = connections.settings[alias]['NAME'].removeprefix('file:').split('?')[0]
+
+        while True:
+            started = time.perf_counter()
+            snapshot(primary['NAME'], target)
+            self.stdout.write(f"Replica refreshed in {(time.perf_counter() - started) * 1000:.0f} ms")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+
+def snapshot(source, target):
+    """Consistent copy of ``source`` into ``target`` via SQLite's backup API"""
+    with sqlite3.connect(f'file:{source}?mode=ro', uri=True) as src, sqlite3.connect(target) as dst:
+        # One step, so readers never see a half-copied database
+        src.backup(dst)
+    src.close()
+    dst.close()
@@ -0,0 +1,41 @@
+"""In-process counters and gauges for the canteen's hot paths.
+
+Values are per worker process and reset on restart; they are meant for a
+quick look at ``/api/metrics/`` or from a shell, not as a time series.
+"""
+import threading
+
+
+class Metrics:
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name, amount=1):
+        """Add ``amount`` to a counter or gauge"""
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def set(self, name, value):
+        with self._lock:
+            self._values[name] = value
+
+    def max(self, name, value):
+        """Keep the highest ``value`` seen (high-water marks)"""
+        with self._lock:
+            if value > self._values.get(name, 0):
+                self._values[name] = value
+
+    def get(self, name, default=0):
+        return self._values.get(name, default)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(sorted(self._values.items()))
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('canteen', '0008_print_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Outlet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('slug', models.SlugField(unique=True)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='menucategory',
+            name='name',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AddField(
+            model_name='menucategory',
+            name='outlet',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='categories', to='canteen.outlet'),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='outlet',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='menu_items', to='canteen.outlet'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='outlet',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='orders', to='canteen.outlet'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['outlet', 'category'], name='menuitem_outlet_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['outlet', 'available'], name='menuitem_outlet_available_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['outlet', 'created_at'], name='order_outlet_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['outlet', 'status', 'created_at'], name='order_outlet_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['outlet', 'updated_at'], name='order_outlet_updated_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='menucategory',
+            constraint=models.UniqueConstraint(fields=('outlet', 'name'), name='menucategory_outlet_name_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='menucategory',
+            constraint=models.UniqueConstraint(condition=models.Q(('outlet__isnull', True)), fields=('name',), name='menucategory_name_unique_without_outlet'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('canteen', '0010_notifications'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer_phone', 'created_at'], name='order_phone_created_idx'),
+        ),
+    ]
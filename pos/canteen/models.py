@@ -1,26 +1,77 @@
+from django.conf import settings
 from django.db import models
 
 # Create your models here.
-class MenuCategory(models.Model):
+class Outlet(models.Model):
+    """A counter on campus with its own menu, orders and staff screens"""
     name = models.CharField(max_length=100, unique=True)
+    slug = models.SlugField(unique=True)
+    is_active = models.BooleanField(default=True)
+
+    def __str__(self):
+        return self.name
+
+class MenuCategory(models.Model):
+    # Null for menus from before outlets existed
+    outlet = models.ForeignKey(Outlet, on_delete=models.CASCADE, related_name='categories', blank=True, null=True)
+    name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='category_images/', blank=True, null=True)  # Added image field
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['outlet', 'name'], name='menucategory_outlet_name_unique'),
+            models.UniqueConstraint(fields=['name'], condition=models.Q(outlet__isnull=True),
+                                    name='menucategory_name_unique_without_outlet'),
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Keep the outlet copied onto the items in step
+        self.items.exclude(outlet=self.outlet).update(outlet=self.outlet)
+
     def __str__(self):
         return self.name
 
 class MenuItem(models.Model):
     category = models.ForeignKey(MenuCategory, on_delete=models.CASCADE, related_name='items')
+    # Copied from the category so outlet menus are read without a join
+    outlet = models.ForeignKey(Outlet, on_delete=models.CASCADE, related_name='menu_items', blank=True, null=True,
+                               editable=False)
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=8, decimal_places=2)
     available = models.BooleanField(default=True)
     image = models.ImageField(upload_to='item_images/', blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['outlet', 'category'], name='menuitem_outlet_category_idx'),
+            models.Index(fields=['outlet', 'available'], name='menuitem_outlet_available_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.outlet_id = self.category.outlet_id
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
     
 
+class PickupSlot(models.Model):
+    """Kitchen capacity for one pickup window, in prep units (item quantities)"""
+    start = models.DateTimeField(unique=True)
+    capacity = models.PositiveIntegerField()
+    reserved = models.PositiveIntegerField(default=0)
+
+    @property
+    def remaining(self):
+        return max(self.capacity - self.reserved, 0)
+
+    def __str__(self):
+        return f"{self.start:%Y-%m-%d %H:%M} ({self.reserved}/{self.capacity})"
+
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -36,6 +87,14 @@ class Order(models.Model):
         ('card', 'Card Payment'),
     ]
 
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name='orders',
+        blank=True,
+        null=True,
+    )
+    outlet = models.ForeignKey(Outlet, on_delete=models.PROTECT, related_name='orders', blank=True, null=True)
     customer_name = models.CharField(max_length=100, blank=True, null=True)
     customer_phone = models.CharField(max_length=15, blank=True, null=True)
     customer_email = models.EmailField(blank=True, null=True)
@@ -44,7 +103,38 @@ class Order(models.Model):
     payment_method = models.CharField(max_length=20, choices=PAYMENT_CHOICES, default='cash')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    pickup_slot = models.ForeignKey(
+        PickupSlot,
+        on_delete=models.SET_NULL,
+        related_name='orders',
+        blank=True,
+        null=True,
+    )
+    # Capacity held in pickup_slot, so it can be handed back on cancellation
+    prep_units = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped on every save; the staff table's ETag is built from it
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # "My orders" lookups: newest first for one account
+            models.Index(fields=['user', 'created_at'], name='order_user_created_idx'),
+            # Admin search by email, newest first (OrderAdmin.get_search_results)
+            models.Index(fields=['customer_email', 'created_at'], name='order_email_created_idx'),
+            # Status filter and date drill-down on the admin changelist
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            models.Index(fields=['created_at'], name='order_created_idx'),
+            # Admin search by phone number, newest first
+            models.Index(fields=['customer_phone', 'created_at'], name='order_phone_created_idx'),
+            # Change fingerprint for the polled orders table
+            models.Index(fields=['updated_at'], name='order_updated_idx'),
+            models.Index(fields=['status', 'updated_at'], name='order_status_updated_idx'),
+            # The same reads scoped to one counter
+            models.Index(fields=['outlet', 'created_at'], name='order_outlet_created_idx'),
+            models.Index(fields=['outlet', 'status', 'created_at'], name='order_outlet_status_idx'),
+            models.Index(fields=['outlet', 'updated_at'], name='order_outlet_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} - {self.status}"
@@ -62,3 +152,65 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"{self.menu_item.name} x {self.quantity}"
+
+
+class PrintJob(models.Model):
+    """One document for one printer, queued at checkout and printed by
+    ``manage.py print_worker``"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Printed'),
+        ('failed', 'Failed'),
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='print_jobs')
+    printer = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    printed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Each printer drains its pending jobs oldest first
+            models.Index(fields=['printer', 'status', 'id'], name='printjob_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Print job #{self.id} - order #{self.order_id} on {self.printer}"
+
+
+class Notification(models.Model):
+    """An order-ready email or SMS, queued when staff mark the order ready
+    and sent by ``manage.py notify_worker``"""
+    CHANNEL_CHOICES = [
+        ('email', 'Email'),
+        ('sms', 'SMS'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='notifications')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    recipient = models.CharField(max_length=254)
+    message = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Each channel sends its pending notifications oldest first
+            models.Index(fields=['channel', 'status', 'id'], name='notification_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_channel_display()} #{self.id} - order #{self.order_id} to {self.recipient}"
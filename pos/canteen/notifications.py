@@ -0,0 +1,197 @@
+"""Order-ready emails and SMS.
+
+Marking an order ``ready`` only inserts ``Notification`` rows, one per
+contact on the order, so the staff click never waits on a mail server;
+``manage.py notify_worker`` sends them. Each channel's notifications go out
+in batches of ``NOTIFY_BATCH_SIZE`` over one connection per batch (one SMTP
+session, one keep-alive connection to the SMS gateway), with email and SMS
+sent side by side from their own threads. A notification that fails is
+retried with exponential backoff, up to ``NOTIFY_MAX_ATTEMPTS`` times.
+
+Email goes through Django's ``EMAIL_BACKEND``. SMS goes through
+``SMS_BACKEND``: ``GatewaySMSBackend`` posts to an HTTP gateway, and
+``LocmemSMSBackend`` keeps messages in ``sms_outbox``, like Django's locmem
+email backend does for tests.
+"""
+import http.client
+import json
+import smtplib
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import queueing
+from .metrics import metrics
+from .models import Notification
+from .queueing import Lane, QueueWorker
+
+# Errors that mean the connection is gone, not just that one message was refused
+SESSION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def canteen_name():
+    return getattr(settings, 'CANTEEN_NAME', 'Campus Canteen')
+
+
+def ready_message(order):
+    return f'{canteen_name()}: your order #{order.id} is ready for pickup.'
+
+
+def enqueue_ready(order):
+    """Queue the order-ready notifications for ``order``"""
+    message = ready_message(order)
+    contacts = [('email', order.customer_email), ('sms', order.customer_phone)]
+    Notification.objects.bulk_create([
+        Notification(order=order, channel=channel, recipient=recipient, message=message)
+        for channel, recipient in contacts if recipient
+    ])
+
+
+# Backends
+
+class EmailChannel:
+    """Sends through ``EMAIL_BACKEND``, one connection per batch"""
+
+    @contextmanager
+    def session(self):
+        with get_connection() as connection:
+            def send(recipient, message):
+                EmailMessage(f'Order ready - {canteen_name()}', message, to=[recipient],
+                             connection=connection).send()
+            yield send
+
+
+class GatewaySMSBackend:
+    """POSTs ``{"to": ..., "message": ...}`` as JSON to ``SMS_GATEWAY_URL``,
+    one keep-alive connection per batch"""
+
+    def __init__(self, url=None, token=None, timeout=10):
+        self.url = urlsplit(url or getattr(settings, 'SMS_GATEWAY_URL', ''))
+        if self.url.scheme not in ('http', 'https'):
+            raise ImproperlyConfigured('SMS_GATEWAY_URL must be an http(s) URL')
+        self.token = token if token is not None else getattr(settings, 'SMS_GATEWAY_TOKEN', '')
+        self.timeout = timeout
+
+    @contextmanager
+    def session(self):
+        connection_class = http.client.HTTPSConnection if self.url.scheme == 'https' else http.client.HTTPConnection
+        conn = connection_class(self.url.hostname, self.url.port, timeout=self.timeout)
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+
+        def send(recipient, message):
+            conn.request('POST', self.url.path or '/', json.dumps({'to': recipient, 'message': message}), headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 300:
+                raise http.client.HTTPException(f'SMS gateway answered {response.status} {response.reason}')
+        try:
+            yield send
+        finally:
+            conn.close()
+
+
+sms_outbox = []
+
+
+class LocmemSMSBackend:
+    """Keeps messages in ``sms_outbox``; for tests and development"""
+
+    @contextmanager
+    def session(self):
+        yield lambda recipient, message: sms_outbox.append({'to': recipient, 'message': message})
+
+
+def get_channels():
+    backend = getattr(settings, 'SMS_BACKEND', 'canteen.notifications.LocmemSMSBackend')
+    return {'email': EmailChannel(), 'sms': import_string(backend)()}
+
+
+# Worker
+
+class ChannelLane(Lane):
+    """Sends one channel's due notifications, oldest first"""
+    setting_prefix = 'NOTIFY'
+    retry_delay = 5
+    max_retry_delay = 600
+    action = 'Sending'
+
+    def __init__(self, name, channel, batch_size=50):
+        self.name = name
+        self.channel = channel
+        self.batch_size = batch_size
+
+    def metric(self, event):
+        return f'notify.{self.name}.{event}'
+
+    def drain(self):
+        """Send until nothing is due or the backend is down; return notifications sent"""
+        sent = 0
+        while True:
+            batch = list(
+                Notification.objects.filter(channel=self.name, status='pending')
+                .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=timezone.now()))
+                .order_by('id')[:self.batch_size]
+            )
+            if not batch:
+                return sent
+            done, ok = self.send_batch(batch)
+            sent += done
+            if not ok:
+                return sent
+
+    def send_batch(self, batch):
+        """Send ``batch`` over one backend session; return ``(sent, ok)``.
+
+        One bad recipient only fails its own notification; ``ok`` is false
+        when the session itself broke and the rest of the batch has to wait.
+        """
+        sent = []
+        unsent = list(batch)
+        try:
+            with self.channel.session() as send:
+                while unsent:
+                    notification = unsent[0]
+                    try:
+                        send(notification.recipient, notification.message)
+                    except SESSION_ERRORS:
+                        raise
+                    except Exception as exc:
+                        self.retry(notification, exc)
+                    else:
+                        sent.append(notification.id)
+                    unsent.pop(0)
+        except Exception as exc:
+            for notification in unsent:
+                self.retry(notification, exc)
+
+        if sent:
+            Notification.objects.filter(id__in=sent).update(status='sent', sent_at=timezone.now())
+            metrics.incr(self.metric('sent'), len(sent))
+        return len(sent), not unsent
+
+
+class NotificationWorker(QueueWorker):
+    """Drains every channel, one pool thread per channel"""
+    thread_name_prefix = 'notify'
+
+    def __init__(self, workers=None, batch_size=None, channels=None):
+        batch_size = batch_size or getattr(settings, 'NOTIFY_BATCH_SIZE', 50)
+        channels = channels if channels is not None else get_channels()
+        super().__init__([ChannelLane(name, channel, batch_size) for name, channel in channels.items()], workers)
+
+    def record_queue_depth(self):
+        record_queue_depth()
+
+
+def record_queue_depth():
+    """Set ``notify.queue_depth`` gauges from the notifications still pending"""
+    channels = [name for name, _ in Notification.CHANNEL_CHOICES]
+    return queueing.record_queue_depth(Notification.objects, 'channel', channels, 'notify')
@@ -0,0 +1,54 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+
+
+class OrderHistoryPagination(CursorPagination):
+    """Keyset pagination for order history.
+
+    Pages are fetched with ``created_at < cursor`` on the (user, created_at)
+    index instead of OFFSET/COUNT, so deep pages cost the same as the first.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that avoids ``COUNT(*)`` on unfiltered tables.
+
+    Counting every row of a large table is a full scan, so for an unfiltered
+    queryset the count is estimated instead: from the planner statistics on
+    PostgreSQL, and from the highest primary key elsewhere. The primary key
+    estimate overcounts by every row ever deleted, so the last pages of the
+    changelist can come up empty. Filtered querysets still get an exact count.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is None or query.where or query.distinct:
+            return super().count
+        estimate = self.estimate(queryset)
+        return super().count if estimate is None else estimate
+
+    def estimate(self, queryset):
+        model = queryset.model
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            # reltuples is -1 until the table has been analysed
+            if row and row[0] >= 0:
+                return row[0]
+            return None
+        return queryset.model._default_manager.using(queryset.db).aggregate(
+            last=Max('pk'))['last'] or 0
@@ -0,0 +1,269 @@
+"""Kitchen tickets and customer receipts.
+
+Checkout only inserts ``PrintJob`` rows, one per configured printer, inside
+the order's transaction; ``manage.py print_worker`` renders and sends them.
+Printers are configured in ``settings.PRINTERS``::
+
+    PRINTERS = {
+        'kitchen': {'document': 'ticket', 'sink': 'tcp://10.0.0.20:9100'},
+        'counter': {'document': 'receipt', 'sink': 'file:///var/spool/canteen/counter'},
+    }
+
+``ticket`` documents are ESC/POS byte streams for thermal printers and
+``receipt`` documents are single-page PDFs. Each printer's jobs print in
+queue order: a failing job is retried with exponential backoff and holds back
+the jobs behind it until it prints or runs out of attempts. Run one worker
+process; it drives every printer from its own thread.
+"""
+import os
+import socket
+import textwrap
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from . import queueing
+from .metrics import metrics
+from .models import Order, OrderItem, PrintJob
+from .queueing import Lane, QueueWorker
+
+# Characters per line: 80mm paper in ESC/POS font A, and the PDF receipt
+TICKET_WIDTH = 42
+RECEIPT_WIDTH = 36
+
+
+def printers():
+    return getattr(settings, 'PRINTERS', {})
+
+
+def enqueue(order):
+    """Queue one job per printer; call inside the checkout transaction"""
+    PrintJob.objects.bulk_create([PrintJob(order=order, printer=name) for name in printers()])
+
+
+# Documents
+
+ESC_INIT = b'\x1b@'
+ESC_BOLD = b'\x1bE\x01'
+ESC_BOLD_OFF = b'\x1bE\x00'
+ESC_CENTER = b'\x1ba\x01'
+ESC_LEFT = b'\x1ba\x00'
+GS_DOUBLE_SIZE = b'\x1d!\x11'
+GS_NORMAL_SIZE = b'\x1d!\x00'
+GS_FEED_AND_CUT = b'\x1dVA\x03'
+
+
+def plain(text):
+    # Printer fonts have no rupee sign
+    return text.replace('₹', 'Rs ')
+
+
+def local_time(value, fmt):
+    return timezone.localtime(value).strftime(fmt)
+
+
+def columns(left, right, width):
+    """``left`` and ``right`` on one line, ``left`` truncated to fit"""
+    return left[:width - len(right) - 1].ljust(width - len(right)) + right
+
+
+def escpos_line(text=''):
+    return plain(text).encode('cp437', errors='replace') + b'\n'
+
+
+def render_ticket(order):
+    """Kitchen ticket as an ESC/POS byte stream"""
+    out = [ESC_INIT, ESC_CENTER, GS_DOUBLE_SIZE, escpos_line(f'#{order.id}'), GS_NORMAL_SIZE]
+    if order.pickup_slot is not None:
+        out.append(escpos_line(f"Pickup {local_time(order.pickup_slot.start, '%H:%M')}"))
+    out += [ESC_LEFT, escpos_line(local_time(order.created_at, '%d %b %Y %H:%M')), escpos_line('-' * TICKET_WIDTH)]
+    for item in order.items.all():
+        out += [ESC_BOLD, escpos_line(f'{item.quantity} x {item.menu_item.name}'), ESC_BOLD_OFF]
+    if order.special_instructions:
+        out.append(escpos_line('-' * TICKET_WIDTH))
+        out += [escpos_line(line) for line in textwrap.wrap(f'Note: {order.special_instructions}', TICKET_WIDTH)]
+    out.append(escpos_line('-' * TICKET_WIDTH))
+    if order.customer_name:
+        out.append(escpos_line(order.customer_name))
+    if order.room_number:
+        out.append(escpos_line(f'Room {order.room_number}'))
+    out.append(GS_FEED_AND_CUT)
+    return b''.join(out)
+
+
+def receipt_lines(order):
+    lines = [getattr(settings, 'CANTEEN_NAME', 'Campus Canteen'), f'Order #{order.id}', local_time(order.created_at, '%d %b %Y %H:%M'), '']
+    for item in order.items.all():
+        lines.append(columns(f'{item.quantity} x {item.menu_item.name}', f'{item.subtotal:.2f}', RECEIPT_WIDTH))
+    lines += [
+        '-' * RECEIPT_WIDTH,
+        columns('Total', f'Rs {order.total_price:.2f}', RECEIPT_WIDTH),
+        f'Paid by: {order.get_payment_method_display()}',
+    ]
+    if order.pickup_slot is not None:
+        lines.append(f"Pickup at {local_time(order.pickup_slot.start, '%H:%M')}")
+    return lines + ['', 'Thank you!']
+
+
+def pdf_text(text):
+    text = plain(text).replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return text.encode('latin-1', errors='replace')
+
+
+def render_pdf(lines, width=226, font_size=9, leading=11):
+    """Single-page PDF with ``lines`` in Courier; 226pt is 80mm paper"""
+    height = 40 + leading * len(lines)
+    stream = b'BT /F1 %d Tf %d TL 12 %d Td\n' % (font_size, leading, height - 20)
+    stream += b''.join(b'(' + pdf_text(line) + b') Tj T*\n' for line in lines) + b'ET'
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+        b'/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>' % (width, height),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>',
+        b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream),
+    ]
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref_at = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref_at)
+    return bytes(out)
+
+
+def render_receipt(order):
+    """Customer receipt as a PDF"""
+    return render_pdf(receipt_lines(order))
+
+
+# document name -> (renderer, file extension)
+DOCUMENTS = {
+    'ticket': (render_ticket, 'bin'),
+    'receipt': (render_receipt, 'pdf'),
+}
+
+
+# Sinks
+
+class FileSink:
+    """Writes each document to its own file; a stand-in for a real printer"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    @contextmanager
+    def session(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        def write(name, data):
+            path = self.directory / name
+            partial = path.with_name(path.name + '.part')
+            partial.write_bytes(data)
+            os.replace(partial, path)
+        yield write
+
+
+class SocketSink:
+    """Raw TCP printing (port 9100), one connection per batch"""
+
+    def __init__(self, host, port=9100, timeout=10):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    @contextmanager
+    def session(self):
+        with socket.create_connection((self.host, self.port), timeout=self.timeout) as conn:
+            yield lambda name, data: conn.sendall(data)
+
+
+def get_sink(url):
+    """``file:///path/to/dir`` or ``tcp://host[:port]``"""
+    parsed = urlsplit(url)
+    if parsed.scheme == 'file':
+        return FileSink(parsed.path)
+    if parsed.scheme == 'tcp':
+        return SocketSink(parsed.hostname, parsed.port or 9100)
+    raise ImproperlyConfigured(f'Unsupported printer sink {url!r}')
+
+
+# Worker
+
+class PrinterLane(Lane):
+    """Prints one printer's queue, oldest job first"""
+    setting_prefix = 'PRINT'
+    action = 'Printing'
+
+    def __init__(self, name, config, batch_size=20):
+        if config['document'] not in DOCUMENTS:
+            raise ImproperlyConfigured(f"Printer {name!r} has unknown document {config['document']!r}")
+        self.name = name
+        self.render, self.extension = DOCUMENTS[config['document']]
+        self.sink = get_sink(config['sink'])
+        self.batch_size = batch_size
+
+    def metric(self, event):
+        return f'print.jobs_{event}'
+
+    def drain(self):
+        """Print until the queue is empty or its head job has to wait; return jobs printed"""
+        printed = 0
+        while True:
+            jobs = list(PrintJob.objects.filter(printer=self.name, status='pending').order_by('id')[:self.batch_size])
+            if not jobs or (jobs[0].next_attempt_at and jobs[0].next_attempt_at > timezone.now()):
+                return printed
+            done, ok = self.print_batch(jobs)
+            printed += done
+            if not ok:
+                return printed
+
+    def print_batch(self, jobs):
+        """Send ``jobs`` in order over one sink session; return ``(printed, ok)``"""
+        orders = Order.objects.select_related('pickup_slot').prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('menu_item'))
+        ).in_bulk([job.order_id for job in jobs])
+
+        printed = []
+        error = None
+        try:
+            with self.sink.session() as write:
+                for job in jobs:
+                    write(f'{self.name}-{job.id}.{self.extension}', self.render(orders[job.order_id]))
+                    printed.append(job.id)
+        except Exception as exc:
+            error = exc
+
+        if printed:
+            PrintJob.objects.filter(id__in=printed).update(status='done', printed_at=timezone.now())
+            metrics.incr('print.jobs_printed', len(printed))
+        if error is None or len(printed) == len(jobs):
+            return len(printed), True
+        # A job that runs out of attempts is marked failed so the jobs behind it can print
+        self.retry(jobs[len(printed)], error)
+        return len(printed), False
+
+
+class PrintWorker(QueueWorker):
+    """Drains every printer's queue, one pool thread per printer"""
+    thread_name_prefix = 'print'
+
+    def __init__(self, workers=None, batch_size=None):
+        batch_size = batch_size or getattr(settings, 'PRINT_BATCH_SIZE', 20)
+        super().__init__([PrinterLane(name, config, batch_size) for name, config in printers().items()], workers)
+
+    def record_queue_depth(self):
+        record_queue_depth()
+
+
+def record_queue_depth():
+    """Set ``print.queue_depth`` gauges from the jobs still pending"""
+    return queueing.record_queue_depth(PrintJob.objects, 'printer', printers(), 'print')
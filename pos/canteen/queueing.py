@@ -0,0 +1,159 @@
+"""What the print and notification queues have in common.
+
+Both queues are database tables with one lane per printer or channel. A
+``QueueWorker`` drains every lane, one pool thread per lane. A lane retries
+a failed row with exponential backoff until it runs out of attempts. Each
+worker command is a ``QueueWorkerCommand`` that polls the queue in a loop.
+"""
+import datetime
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import Count
+from django.utils import timezone
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Lane:
+    """One printer's or channel's share of a queue.
+
+    Subclasses implement ``drain`` and ``metric``. ``setting_prefix`` names
+    the ``<prefix>_MAX_ATTEMPTS`` and ``<prefix>_RETRY_DELAY`` settings.
+    """
+    setting_prefix = None
+    retry_delay = 2
+    max_retry_delay = 300
+    action = 'Processing'
+
+    def drain(self):
+        """Work until nothing is due or the lane has to wait; return rows done"""
+        raise NotImplementedError
+
+    def metric(self, event):
+        """Name of the counter bumped when a row is ``failed`` or ``retried``"""
+        raise NotImplementedError
+
+    def retry(self, item, error):
+        """Record that ``item`` failed. Schedule another attempt, or mark it
+        failed once it has used up its attempts."""
+        item.attempts += 1
+        item.last_error = f'{type(error).__name__}: {error}'
+        if item.attempts >= getattr(settings, f'{self.setting_prefix}_MAX_ATTEMPTS', 5):
+            item.status = 'failed'
+            metrics.incr(self.metric('failed'))
+            logger.error("Giving up on %s after %d attempts: %s", item, item.attempts, item.last_error)
+        else:
+            base = getattr(settings, f'{self.setting_prefix}_RETRY_DELAY', self.retry_delay)
+            delay = min(base * 2 ** (item.attempts - 1), self.max_retry_delay)
+            item.next_attempt_at = timezone.now() + datetime.timedelta(seconds=delay)
+            metrics.incr(self.metric('retried'))
+            logger.warning("%s %s failed, retrying in %ss: %s", self.action, item, delay, item.last_error)
+        item.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def drain_in_thread(lane):
+    # Pool threads hold their own connections; recycle them like a request would
+    close_old_connections()
+    try:
+        return lane.drain()
+    finally:
+        close_old_connections()
+
+
+class QueueWorker:
+    """Drains every lane, one pool thread per lane.
+
+    With ``workers=1`` the lanes run one after another in the calling thread.
+    """
+    thread_name_prefix = 'queue'
+
+    def __init__(self, lanes, workers=None):
+        self.lanes = lanes
+        workers = min(workers or len(self.lanes), len(self.lanes))
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix=self.thread_name_prefix) if workers > 1 else None
+
+    def run_once(self):
+        """Work through everything that is due; return the number of rows done"""
+        if self.pool is None:
+            done = sum(lane.drain() for lane in self.lanes)
+        else:
+            done = sum(self.pool.map(drain_in_thread, self.lanes))
+        self.record_queue_depth()
+        return done
+
+    def record_queue_depth(self):
+        pass
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def record_queue_depth(queryset, field, names, prefix):
+    """Set ``<prefix>.queue_depth`` gauges from the pending rows of
+    ``queryset``, grouped by ``field``. Every lane in ``names`` gets a gauge."""
+    depths = dict(
+        queryset.filter(status='pending').order_by()
+        .values_list(field).annotate(count=Count('id'))
+    )
+    for name in names:
+        metrics.set(f'{prefix}.queue_depth.{name}', depths.get(name, 0))
+    metrics.set(f'{prefix}.queue_depth', sum(depths.values()))
+    return depths
+
+
+class QueueWorkerCommand(BaseCommand):
+    """Runs a ``QueueWorker`` until interrupted.
+
+    Subclasses implement ``get_worker``, ``queue_depths`` and ``report``.
+    ``poll_setting`` names the setting for the idle sleep, in seconds.
+    """
+    lane_name = 'lane'
+    batch_size_help = 'Rows sent per connection'
+    poll_setting = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Work through what is due, then exit')
+        parser.add_argument('--workers', type=int, help=f'Pool threads (default: one per {self.lane_name})')
+        parser.add_argument('--batch-size', type=int, help=self.batch_size_help)
+        parser.add_argument('--status', action='store_true',
+                            help=f'Show queue depth per {self.lane_name} and exit')
+
+    def get_worker(self, workers, batch_size):
+        raise NotImplementedError
+
+    def queue_depths(self):
+        """``(lane, pending)`` pairs for ``--status``"""
+        raise NotImplementedError
+
+    def report(self, done):
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        if options['status']:
+            for name, pending in self.queue_depths():
+                self.stdout.write(f"{name:<20} {pending:>6} pending")
+            return
+
+        worker = self.get_worker(options['workers'], options['batch_size'])
+        interval = getattr(settings, self.poll_setting, 1.0)
+        try:
+            while True:
+                done = worker.run_once()
+                if done:
+                    self.report(done)
+                if options['once']:
+                    break
+                if not done:
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            worker.close()
@@ -0,0 +1,155 @@
+"""Fast read path for the hot list/retrieve endpoints.
+
+``ModelSerializer`` spends most of a large list response in per-field
+machinery. For reads, a ``RowReader`` instead pulls the needed columns with
+``.values_list()`` and builds plain dicts, running a formatter only on the
+columns that need one. Output is identical to the serializers in
+``serializers.py``, which keep handling every write.
+"""
+from decimal import Decimal
+
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
+
+from .models import MenuItem, OrderItem
+
+# SQLite keeps well under its bound-parameter limit with this many ids
+IN_CHUNK_SIZE = 900
+
+
+def decimal_formatter(places):
+    exponent = Decimal(1).scaleb(-places)
+    return lambda value: None if value is None else str(value.quantize(exponent))
+
+
+def datetime_formatter():
+    """Same ISO 8601 output as DRF's ``DateTimeField``"""
+    # Looked up once per response rather than once per value
+    tz = timezone.get_current_timezone()
+
+    def format_datetime(value):
+        if value is None:
+            return None
+        value = value.astimezone(tz).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return format_datetime
+
+
+def image_url_formatter(field, request):
+    """Absolute media URLs as DRF's ``ImageField`` renders them"""
+    base_url = field.storage.url('')
+    if request is not None:
+        base_url = request.build_absolute_uri(base_url)
+    return lambda name: base_url + filepath_to_uri(name).lstrip('/') if name else None
+
+
+class RowReader:
+    """Builds API dicts from ``.values_list()`` rows.
+
+    ``fields`` is a sequence of ``(key, lookup, formatter)``; ``formatter``
+    may be ``None`` for columns that are already JSON-ready.
+    """
+
+    def __init__(self, fields):
+        self.keys = tuple(key for key, _, _ in fields)
+        self.lookups = tuple(lookup for _, lookup, _ in fields)
+        self.formatted = tuple((key, formatter) for key, _, formatter in fields if formatter)
+
+    def read(self, queryset):
+        keys, formatted = self.keys, self.formatted
+        rows = []
+        for values in queryset.values_list(*self.lookups):
+            row = dict(zip(keys, values))
+            for key, formatter in formatted:
+                row[key] = formatter(row[key])
+            rows.append(row)
+        return rows
+
+
+def chunked(ids):
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        yield ids[start:start + IN_CHUNK_SIZE]
+
+
+def menu_item_reader(request):
+    image_url = image_url_formatter(MenuItem._meta.get_field('image'), request)
+    return RowReader([
+        ('id', 'id', None),
+        ('name', 'name', None),
+        ('description', 'description', None),
+        ('price', 'price', decimal_formatter(2)),
+        ('available', 'available', None),
+        ('image', 'image', image_url),
+        ('category', 'category_id', None),
+        ('category_name', 'category__name', None),
+        ('outlet', 'outlet_id', None),
+    ])
+
+
+def menu_item_rows(queryset, request):
+    """Rows shaped like ``MenuItemSerializer``"""
+    return menu_item_reader(request).read(queryset)
+
+
+def menu_category_rows(queryset, request):
+    """Rows shaped like ``MenuCategorySerializer``, items nested"""
+    categories = RowReader([
+        ('id', 'id', None),
+        ('outlet', 'outlet_id', None),
+        ('name', 'name', None),
+        ('description', 'description', None),
+    ]).read(queryset)
+
+    items_by_category = {category['id']: [] for category in categories}
+    reader = menu_item_reader(request)
+    for ids in chunked(list(items_by_category)):
+        for item in reader.read(MenuItem.objects.filter(category_id__in=ids).order_by('id')):
+            items_by_category[item['category']].append(item)
+    for category in categories:
+        category['items'] = items_by_category[category['id']]
+    return categories
+
+
+def order_reader():
+    format_datetime = datetime_formatter()
+    return RowReader([
+        ('id', 'id', None),
+        ('outlet', 'outlet_id', None),
+        ('customer_name', 'customer_name', None),
+        ('customer_phone', 'customer_phone', None),
+        ('customer_email', 'customer_email', None),
+        ('room_number', 'room_number', None),
+        ('special_instructions', 'special_instructions', None),
+        ('payment_method', 'payment_method', None),
+        ('status', 'status', None),
+        ('total_price', 'total_price', decimal_formatter(2)),
+        ('pickup_time', 'pickup_slot__start', format_datetime),
+        ('created_at', 'created_at', format_datetime),
+    ])
+
+
+ORDER_ITEM_FIELDS = [
+    ('order', 'order_id', None),
+    ('id', 'id', None),
+    ('menu_item', 'menu_item_id', None),
+    ('menu_item_name', 'menu_item__name', None),
+    ('quantity', 'quantity', None),
+    ('subtotal', 'subtotal', decimal_formatter(2)),
+]
+
+
+def order_rows(queryset, request):
+    """Rows shaped like ``OrderSerializer``, items nested"""
+    orders = order_reader().read(queryset)
+
+    items_by_order = {order['id']: [] for order in orders}
+    reader = RowReader(ORDER_ITEM_FIELDS)
+    for ids in chunked(list(items_by_order)):
+        for item in reader.read(OrderItem.objects.filter(order_id__in=ids).order_by('id')):
+            items_by_order[item.pop('order')].append(item)
+
+    for order in orders:
+        order['items'] = items_by_order[order['id']]
+    return orders
@@ -0,0 +1,91 @@
+"""Read-replica routing for menu browsing, order history and reports.
+
+Nothing goes to the replica by default: a read only does when it runs
+inside ``use_replica()``, which the opted-in views enter for safe requests.
+Writes, and every read outside those views, stay on ``default``.
+
+A client that has just written (checkout, menu edits, admin saves) is
+pinned to the primary for ``REPLICA_STICKY_SECONDS`` by a cookie, so it
+reads its own writes while the replica catches up.
+
+Set ``REPLICA_DATABASE_ALIAS`` to a configured ``DATABASES`` alias to turn
+it on; without one, every read stays on ``default``.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+PIN_COOKIE = 'primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_alias():
+    alias = getattr(settings, 'REPLICA_DATABASE_ALIAS', None)
+    return alias if alias in connections.settings else None
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Send reads inside the block to the replica (when one is configured)"""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def read_from_replica():
+    """Switch the rest of the enclosing ``use_replica()`` block to the replica"""
+    _replica_reads.set(True)
+
+
+def pinned_to_primary(request):
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def may_read_replica(request):
+    return request.method in SAFE_METHODS and not pinned_to_primary(request)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replica rows are copies of primary rows
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica only ever receives copies of the primary
+        if db == getattr(settings, 'REPLICA_DATABASE_ALIAS', None):
+            return False
+        return None
+
+
+class ReplicaPinMiddleware:
+    """Pin a client to the primary for a while after it writes"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+            response.set_cookie(PIN_COOKIE, str(int(time.time()) + seconds + 1), max_age=seconds,
+                                samesite=settings.SESSION_COOKIE_SAMESITE,
+                                secure=settings.SESSION_COOKIE_SECURE)
+        return response
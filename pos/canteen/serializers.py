@@ -1,19 +1,21 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import MenuCategory, MenuItem, Order, OrderItem
+from . import printing, slots
+from .models import MenuCategory, MenuItem, Order, OrderItem, Outlet
 
 class MenuItemSerializer(serializers.ModelSerializer):
     category_name = serializers.ReadOnlyField(source='category.name')
     
     class Meta:
         model = MenuItem
-        fields = ['id', 'name', 'description', 'price', 'available', 'image', 'category', 'category_name']
+        fields = ['id', 'name', 'description', 'price', 'available', 'image', 'category', 'category_name', 'outlet']
 
 class MenuCategorySerializer(serializers.ModelSerializer):
     items = MenuItemSerializer(many=True, read_only=True)
 
     class Meta:
         model = MenuCategory
-        fields = ['id', 'name', 'description', 'items']
+        fields = ['id', 'outlet', 'name', 'description', 'items']
 
 class OrderItemSerializer(serializers.ModelSerializer):
     menu_item_name = serializers.ReadOnlyField(source='menu_item.name')
@@ -26,16 +28,65 @@ class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True)
     total_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
+    # Start of the reserved pickup slot; omitted means "as soon as possible"
+    pickup_time = serializers.DateTimeField(source='pickup_slot.start', required=False,
+                                            allow_null=True, default=None)
+    # Defaults to the outlet the items come from
+    outlet = serializers.PrimaryKeyRelatedField(queryset=Outlet.objects.filter(is_active=True),
+                                                required=False, allow_null=True)
 
     class Meta:
         model = Order
-        fields = ['id', 'customer_name', 'customer_phone', 'customer_email', 'room_number', 
-                 'special_instructions', 'payment_method', 'status', 'total_price', 'items', 'created_at']
+        fields = ['id', 'outlet', 'customer_name', 'customer_phone', 'customer_email', 'room_number', 
+                 'special_instructions', 'payment_method', 'status', 'total_price', 'items',
+                 'pickup_time', 'created_at']
         read_only_fields = ['total_price', 'created_at']
 
+    def validate(self, attrs):
+        if self.instance is not None:
+            if 'outlet' in attrs and attrs['outlet'] != self.instance.outlet:
+                raise serializers.ValidationError({'outlet': 'An order cannot move to another outlet'})
+            return attrs
+
+        # Items without an outlet come from the shared (pre-outlet) menu
+        item_outlets = {item['menu_item'].outlet_id for item in attrs.get('items', [])} - {None}
+        outlet = attrs.get('outlet')
+        if outlet is None and len(item_outlets) == 1:
+            outlet = Outlet.objects.filter(pk=next(iter(item_outlets)), is_active=True).first()
+            if outlet is None:
+                raise serializers.ValidationError({'outlet': 'This outlet is not taking orders'})
+            attrs['outlet'] = outlet
+        if item_outlets - {outlet.id if outlet else None}:
+            raise serializers.ValidationError({'items': 'All items must come from the same outlet'})
+        return attrs
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        # A PUT echoes the whole order back; only reject real changes
+        requested_start = validated_data.pop('pickup_slot', {}).get('start')
+        current_start = instance.pickup_slot.start if instance.pickup_slot_id else None
+        if requested_start is not None and requested_start != current_start:
+            raise serializers.ValidationError({'pickup_time': 'The pickup slot cannot be changed'})
+        items = validated_data.pop('items', None)
+        if items is not None and sorted((item['menu_item'].id, item.get('quantity', 1)) for item in items) != sorted(
+                instance.items.values_list('menu_item_id', 'quantity')):
+            raise serializers.ValidationError({'items': 'The items of a placed order cannot be changed'})
+
+        if instance.status == 'cancelled' and validated_data.get('status', 'cancelled') != 'cancelled':
+            # Cancelling handed the capacity back; take it again at checkout's terms
+            if instance.pickup_slot_id and instance.prep_units and \
+                    not slots.try_reserve(instance.pickup_slot, instance.prep_units):
+                raise serializers.ValidationError(
+                    {'status': 'The pickup slot was filled after this order was cancelled'})
+        return super().update(instance, validated_data)
+
+    @transaction.atomic
     def create(self, validated_data):
         items_data = validated_data.pop('items')
-        order = Order.objects.create(**validated_data)
+        requested_start = validated_data.pop('pickup_slot', {}).get('start')
+        prep_units = sum(item_data.get('quantity', 1) for item_data in items_data)
+        pickup_slot = slots.reserve(prep_units, requested_start)
+        order = Order.objects.create(pickup_slot=pickup_slot, prep_units=prep_units, **validated_data)
 
         total_price = 0
         for item_data in items_data:
@@ -46,4 +97,6 @@ class OrderSerializer(serializers.ModelSerializer):
 
         order.total_price = total_price
         order.save()
+        # Tickets are only queued here; print_worker renders and sends them
+        printing.enqueue(order)
         return order
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""Pickup slots and kitchen admission control.
+
+The day is cut into ``PICKUP_SLOT_MINUTES`` windows within
+``PICKUP_OPENING_HOURS``; each holds ``PICKUP_SLOT_CAPACITY`` prep units
+(one unit per item quantity). Checkout reserves capacity with a single
+conditional UPDATE, so two orders can never overfill a slot, and orders
+that do not fit are pointed at the next free slot instead of joining an
+ever-growing kitchen queue.
+"""
+import datetime
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.fields import DateTimeField
+
+from .models import PickupSlot
+
+
+class SlotFull(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_code = 'slot_full'
+
+    def __init__(self, next_slot=None):
+        detail = {'error': 'This pickup slot is full'}
+        if next_slot is not None:
+            # Same format as the slot list, so clients can match it directly
+            detail['next_slot'] = DateTimeField().to_representation(next_slot)
+        else:
+            detail['error'] = 'No pickup slots are free right now'
+        super().__init__(detail)
+
+
+def slot_length():
+    return datetime.timedelta(minutes=settings.PICKUP_SLOT_MINUTES)
+
+
+def opening_hours():
+    opens, closes = settings.PICKUP_OPENING_HOURS
+    return datetime.time.fromisoformat(opens), datetime.time.fromisoformat(closes)
+
+
+def earliest_start():
+    return timezone.now() + datetime.timedelta(minutes=settings.PICKUP_LEAD_MINUTES)
+
+
+def upcoming_starts(count, after=None):
+    """The next ``count`` slot starts at or after ``after`` (default: the
+    earliest time the kitchen can have an order ready)"""
+    tz = timezone.get_current_timezone()
+    length = slot_length()
+    opens, closes = opening_hours()
+    after = timezone.localtime(after or earliest_start(), tz).replace(tzinfo=None)
+
+    # Round up to a slot boundary
+    midnight = after.replace(hour=0, minute=0, second=0, microsecond=0)
+    slots_into_day = -(-(after - midnight) // length)
+    start = midnight + slots_into_day * length
+
+    starts = []
+    while len(starts) < count:
+        day_opens = datetime.datetime.combine(start.date(), opens)
+        day_closes = datetime.datetime.combine(start.date(), closes)
+        if start < day_opens:
+            start = day_opens
+        if start + length > day_closes:
+            start = day_opens + datetime.timedelta(days=1)
+            continue
+        starts.append(timezone.make_aware(start, tz))
+        start += length
+    return starts
+
+
+def load_slots(starts):
+    """``PickupSlot`` rows for ``starts``, in order, creating any missing"""
+    slots = {slot.start: slot for slot in PickupSlot.objects.filter(start__in=starts)}
+    missing = [start for start in starts if start not in slots]
+    if missing:
+        PickupSlot.objects.bulk_create(
+            [PickupSlot(start=start, capacity=settings.PICKUP_SLOT_CAPACITY) for start in missing],
+            ignore_conflicts=True,
+        )
+        slots.update((slot.start, slot) for slot in PickupSlot.objects.filter(start__in=missing))
+    return [slots[start] for start in starts]
+
+
+def availability(count=None):
+    """Upcoming slots with their remaining capacity"""
+    count = count or settings.PICKUP_SLOTS_AHEAD
+    length = slot_length()
+    return [
+        {
+            'start': slot.start,
+            'end': slot.start + length,
+            'capacity': slot.capacity,
+            'remaining': slot.remaining,
+        }
+        for slot in load_slots(upcoming_starts(count))
+    ]
+
+
+def try_reserve(slot, units):
+    """Atomically take ``units`` from ``slot`` if they still fit"""
+    return PickupSlot.objects.filter(
+        pk=slot.pk, reserved__lte=F('capacity') - units,
+    ).update(reserved=F('reserved') + units) == 1
+
+
+def reserve(units, requested_start=None):
+    """Reserve ``units`` in the requested slot, or the first slot with room.
+
+    Raises ``SlotFull`` (naming the next free slot) when the requested slot
+    cannot take the order.
+    """
+    if units > settings.PICKUP_SLOT_CAPACITY:
+        raise ValidationError({'items': 'This order is too large for a single pickup slot'})
+
+    if requested_start is not None:
+        if requested_start not in upcoming_starts(1, after=requested_start) or requested_start < earliest_start():
+            raise ValidationError({'pickup_time': 'Choose one of the available pickup slots'})
+        candidates = load_slots(upcoming_starts(settings.PICKUP_SLOTS_AHEAD, after=requested_start))
+        requested, later = candidates[0], candidates[1:]
+        if try_reserve(requested, units):
+            return requested
+        raise SlotFull(next((slot.start for slot in later if slot.remaining >= units), None))
+
+    for slot in load_slots(upcoming_starts(settings.PICKUP_SLOTS_AHEAD)):
+        if slot.remaining >= units and try_reserve(slot, units):
+            return slot
+    raise SlotFull()
+
+
+def release(order):
+    """Hand an order's reserved capacity back to its slot"""
+    if order.pickup_slot_id and order.prep_units:
+        PickupSlot.objects.filter(pk=order.pickup_slot_id).update(
+            reserved=Greatest(F('reserved') - order.prep_units, 0))
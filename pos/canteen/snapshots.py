@@ -0,0 +1,70 @@
+"""Per-outlet menu snapshots.
+
+A counter's menu changes a few times a day but is fetched by every screen
+and student at that counter. ``?outlet=<id>`` menu lists are served from a
+snapshot in ``CACHES[MENU_SNAPSHOT_CACHE_ALIAS]``, keyed by a per-outlet
+version that is bumped whenever one of the outlet's categories or items is
+saved or deleted. Snapshots also expire after ``MENU_SNAPSHOT_TTL`` seconds,
+which bounds staleness when workers do not share a cache.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .metrics import metrics
+from .models import MenuCategory, MenuItem
+
+
+def snapshot_cache():
+    return caches[getattr(settings, 'MENU_SNAPSHOT_CACHE_ALIAS', 'default')]
+
+
+def version_key(outlet_id):
+    return f'menu_snapshot_version:{outlet_id}'
+
+
+def menu_snapshot(kind, outlet_id, request, build):
+    """Cached ``build()`` result for one outlet's ``kind`` of menu list"""
+    cache = snapshot_cache()
+    version = cache.get(version_key(outlet_id), 0)
+    # Image URLs are absolute, so the host is part of the snapshot
+    key = f"menu_snapshot:{kind}:{outlet_id}:{version}:{request.build_absolute_uri('/')}"
+    rows = cache.get(key)
+    if rows is None:
+        metrics.incr('menu_snapshot.misses')
+        rows = build()
+        cache.set(key, rows, getattr(settings, 'MENU_SNAPSHOT_TTL', 60))
+    else:
+        metrics.incr('menu_snapshot.hits')
+    return rows
+
+
+def invalidate(outlet_id):
+    cache = snapshot_cache()
+    try:
+        cache.incr(version_key(outlet_id))
+    except ValueError:
+        cache.set(version_key(outlet_id), 1, None)
+
+
+@receiver(pre_save, sender=MenuItem)
+@receiver(pre_save, sender=MenuCategory)
+def _remember_outlet(sender, instance, **kwargs):
+    # Moving a category or item to another counter changes that counter's menu too
+    instance._previous_outlet_id = (
+        sender.objects.filter(pk=instance.pk).values_list('outlet_id', flat=True).first()
+        if instance.pk is not None else None
+    )
+
+
+@receiver([post_save, post_delete], sender=MenuItem)
+@receiver([post_save, post_delete], sender=MenuCategory)
+def _menu_changed(sender, instance, **kwargs):
+    # The category's items move with it in a signal-less update(), but the
+    # version covers the whole outlet menu, so invalidating both outlets is enough
+    outlet_ids = {instance.outlet_id, getattr(instance, '_previous_outlet_id', None)} - {None}
+    for outlet_id in outlet_ids:
+        # After commit, so a reader cannot cache the old menu under the new version
+        transaction.on_commit(lambda outlet_id=outlet_id: invalidate(outlet_id))
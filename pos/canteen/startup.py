@@ -0,0 +1,58 @@
+"""Measure how long a cold process takes to import and set up Django.
+
+The measurement runs in a fresh interpreter with ``python -X importtime`` so
+nothing already imported by the caller skews it.
+"""
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+PROBE = """
+import importlib, json, sys, time
+started = time.perf_counter()
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+configured = time.perf_counter()
+django.setup()
+ready = time.perf_counter()
+importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+print(json.dumps({
+    'settings': configured - started,
+    'apps_ready': ready - configured,
+    'import_target': imported - ready,
+    'total': imported - started,
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """``(module, self_seconds, cumulative_seconds, depth)`` per imported module"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6, depth))
+    return modules
+
+
+def profile_startup(target='pos.asgi'):
+    """Cold-start ``target`` and return phase timings and per-module import times"""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'pos.settings'))
+    # The probe loads settings before the target, so opt out of daphne's
+    # runserver here the way pos/asgi.py does for a real worker
+    env.setdefault('DJANGO_DAPHNE_RUNSERVER', '0')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE, target],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return {
+        'phases': json.loads(result.stdout.strip().splitlines()[-1]),
+        'modules': parse_importtime(result.stderr),
+    }
@@ -1,3 +1,1025 @@
-from django.test import TestCase
+import datetime
+import json
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+from decimal import Decimal
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib import admin
+from django.contrib.auth.models import AnonymousUser, User
+from django.core import mail
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from . import notifications, slots
+from .benchmarks import find_regressions, measure
+from .broadcast import broadcast_order, order_groups
+from .caching import LRUCache
+from .factories import seed_menu, seed_orders
+from .consumers import OrderConsumer
+from .fragments import get_row_cache, render_rows
+from .forecasting import SLOTS_PER_DAY, forecast_demand, smoothing_weights
+from .metrics import metrics
+from .readers import menu_category_rows, menu_item_rows, order_rows
+from .renderers import ORJSONRenderer
+from .routers import PIN_COOKIE, ReplicaRouter, use_replica
+from .serializers import MenuCategorySerializer, MenuItemSerializer, OrderSerializer
+from .startup import profile_startup
+from .models import MenuCategory, MenuItem, Notification, Order, OrderItem, Outlet, PrintJob
+from .notifications import NotificationWorker
+from .printing import PrintWorker
+from .throttling import CacheBucketStore, MemoryBucketStore, get_store
+
+
+class CanteenTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = MenuCategory.objects.create(name='Snacks')
+        cls.samosa = MenuItem.objects.create(category=cls.category, name='Samosa', price=Decimal('15.00'))
+        cls.student = User.objects.create_user(
+            username='2021cs1234@iiitkota.ac.in',
+            email='2021cs1234@iiitkota.ac.in',
+            password='correct-horse',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        get_store().clear()
+
+    def place_order(self, **extra):
+        payload = {'customer_name': 'Asha', 'customer_phone': '9999999999',
+                   'items': [{'menu_item': self.samosa.id, 'quantity': 2}]}
+        payload.update(extra)
+        return self.client.post('/api/orders/', payload, format='json')
+
+
+class OrderHistoryTests(CanteenTestCase):
+    def test_checkout_links_signed_in_user(self):
+        self.client.force_login(self.student)
+        response = self.place_order()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Order.objects.get(pk=response.data['id']).user, self.student)
+
+    def test_anonymous_checkout_has_no_user(self):
+        response = self.place_order()
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(Order.objects.get(pk=response.data['id']).user)
+
+    def test_mine_requires_login(self):
+        response = self.client.get('/api/orders/mine/')
+        self.assertIn(response.status_code, (401, 403))
+
+    def test_mine_lists_only_linked_orders(self):
+        own = Order.objects.create(user=self.student)
+        # A guest order with the same email may belong to someone else
+        Order.objects.create(customer_email=self.student.email, room_number='B-204')
+        Order.objects.create(customer_email='someone@iiitkota.ac.in')
+
+        self.client.force_login(self.student)
+        response = self.client.get('/api/orders/mine/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([order['id'] for order in response.data['results']], [own.id])
+
+    def test_mine_is_cursor_paginated(self):
+        Order.objects.bulk_create([Order(user=self.student) for _ in range(5)])
+        self.client.force_login(self.student)
+        response = self.client.get('/api/orders/mine/', {'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+        with self.assertNumQueries(4):  # session, user, orders page, prefetched items
+            self.client.get(response.data['next'])
+
+
+class LRUCacheTests(TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+
+    def test_entries_expire(self):
+        now = [0.0]
+        cache = LRUCache(maxsize=10, clock=lambda: now[0])
+        cache.set('a', 1, ttl=5)
+        now[0] = 4.9
+        self.assertEqual(cache.get('a'), 1)
+        now[0] = 5.0
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+
+class ThrottleTests(CanteenTestCase):
+    def test_bucket_refills_over_time(self):
+        now = [0.0]
+        store = MemoryBucketStore(clock=lambda: now[0])
+        self.assertEqual(store.consume('k', 2, 1), (True, 0))
+        self.assertEqual(store.consume('k', 2, 1), (True, 0))
+        allowed, wait = store.consume('k', 2, 1)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 1.0)
+        now[0] = 1.0
+        self.assertTrue(store.consume('k', 2, 1)[0])
+
+    def test_cache_store_clear_keeps_other_keys(self):
+        cache = caches['default']
+        cache.set('unrelated', 1)
+        store = CacheBucketStore()
+        store.consume('throttle:k', 1, 1)
+        self.assertFalse(store.consume('throttle:k', 1, 1)[0])
+        store.clear()
+        self.assertTrue(store.consume('throttle:k', 1, 1)[0])
+        self.assertEqual(cache.get('unrelated'), 1)
+        cache.delete_many(['unrelated', 'throttle:k'])
+
+    @override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'checkout': '2/min'}})
+    def test_checkout_is_throttled_per_client(self):
+        self.assertEqual(self.place_order().status_code, 201)
+        self.assertEqual(self.place_order().status_code, 201)
+        response = self.place_order()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    @override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'checkout': '2/min'}})
+    def test_forwarded_for_header_cannot_dodge_the_ip_limit(self):
+        statuses = []
+        for i in range(3):
+            # A fresh client each time: no session cookie to throttle on either
+            self.client = APIClient()
+            response = self.client.post('/api/orders/', {
+                'customer_name': 'Asha', 'customer_phone': '9999999999',
+                'items': [{'menu_item': self.samosa.id, 'quantity': 1}],
+            }, format='json', HTTP_X_FORWARDED_FOR=f'10.0.0.{i}')
+            statuses.append(response.status_code)
+        self.assertEqual(statuses, [201, 201, 429])
+
+    @override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'checkout': '1/min'}})
+    def test_order_reads_are_not_throttled(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get('/api/orders/').status_code, 200)
+
+
+class OrderConsumerTests(CanteenTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.cook = User.objects.create_user('cook', 'cook@iiitkota.ac.in', is_staff=True)
+
+    async def connect(self, user=None, session=None, path='/ws/orders/'):
+        communicator = WebsocketCommunicator(OrderConsumer.as_asgi(), path)
+        communicator.scope['user'] = user or AnonymousUser()
+        communicator.scope['session'] = session or {}
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def create_order(self, **fields):
+        return await Order.objects.acreate(**fields)
+
+    async def test_staff_feed_receives_every_order(self):
+        staff = await self.connect(user=self.cook)
+        order = await self.create_order()
+        await sync_to_async(broadcast_order)(order, 'new_order')
+        event = await staff.receive_json_from()
+        self.assertEqual((event['type'], event['data']['id']), ('new_order', order.id))
+        await staff.disconnect()
+
+    async def test_outlet_feed_only_receives_its_outlet(self):
+        north, south = [await Outlet.objects.acreate(name=name, slug=name.lower()) for name in ('North', 'South')]
+        screen = await self.connect(user=self.cook, path=f'/ws/orders/?outlet={north.id}')
+        await sync_to_async(broadcast_order)(await self.create_order(outlet=south), 'new_order')
+        mine = await self.create_order(outlet=north)
+        await sync_to_async(broadcast_order)(mine, 'new_order')
+        self.assertEqual((await screen.receive_json_from())['data']['id'], mine.id)
+
+        await screen.send_json_to({'action': 'filter', 'statuses': ['ready']})
+        self.assertEqual((await screen.receive_json_from())['type'], 'filtered')
+        await sync_to_async(broadcast_order)(await self.create_order(outlet=south, status='ready'), 'new_order')
+        self.assertTrue(await screen.receive_nothing())
+        await screen.disconnect()
+
+    async def test_tracking_socket_only_receives_its_order(self):
+        mine = await self.create_order(user=self.student)
+        other = await self.create_order()
+        tracker = await self.connect(user=self.student)
+        await tracker.send_json_to({'action': 'subscribe', 'order': mine.id})
+        self.assertEqual(await tracker.receive_json_from(), {'type': 'subscribed', 'order': mine.id})
+
+        await sync_to_async(broadcast_order)(other, 'order_update')
+        await sync_to_async(broadcast_order)(mine, 'order_update')
+        event = await tracker.receive_json_from()
+        self.assertEqual(event['data']['id'], mine.id)
+        self.assertTrue(await tracker.receive_nothing())
+        await tracker.disconnect()
+
+    async def test_session_can_track_anonymous_order(self):
+        order = await self.create_order()
+        tracker = await self.connect(session={'tracked_orders': [order.id]})
+        await tracker.send_json_to({'action': 'subscribe', 'order': order.id})
+        self.assertEqual((await tracker.receive_json_from())['type'], 'subscribed')
+        await sync_to_async(broadcast_order)(await self.create_order(), 'new_order')
+        self.assertTrue(await tracker.receive_nothing())
+        await sync_to_async(broadcast_order)(order, 'order_update')
+        self.assertEqual((await tracker.receive_json_from())['data']['id'], order.id)
+        await tracker.disconnect()
+
+    async def test_feed_needs_a_staff_session(self):
+        for user in (None, self.student):
+            socket = await self.connect(user=user)
+            await sync_to_async(broadcast_order)(await self.create_order(), 'new_order')
+            self.assertTrue(await socket.receive_nothing())
+            await socket.send_json_to({'action': 'filter', 'statuses': []})
+            self.assertEqual((await socket.receive_json_from())['type'], 'error')
+            await socket.disconnect()
+
+    async def test_malformed_status_filter_is_an_error(self):
+        staff = await self.connect(user=self.cook)
+        for statuses in (5, 'ready', [['ready']]):
+            await staff.send_json_to({'action': 'filter', 'statuses': statuses})
+            self.assertEqual((await staff.receive_json_from())['type'], 'error')
+        await staff.disconnect()
+
+    async def test_cannot_track_someone_elses_order(self):
+        order = await self.create_order()
+        tracker = await self.connect(user=self.student)
+        await tracker.send_json_to({'action': 'subscribe', 'order': order.id})
+        self.assertEqual((await tracker.receive_json_from())['type'], 'error')
+        await tracker.disconnect()
+
+    async def test_staff_status_filter(self):
+        staff = await self.connect(user=self.cook)
+        await staff.send_json_to({'action': 'filter', 'statuses': ['ready']})
+        self.assertEqual(await staff.receive_json_from(), {'type': 'filtered', 'statuses': ['ready']})
+
+        await sync_to_async(broadcast_order)(await self.create_order(), 'new_order')
+        self.assertTrue(await staff.receive_nothing())
+
+        ready = await self.create_order(status='ready')
+        await sync_to_async(broadcast_order)(ready, 'order_update', 'preparing')
+        self.assertEqual((await staff.receive_json_from())['data']['id'], ready.id)
+        await staff.disconnect()
+
+    async def test_filtered_screen_gets_a_status_change_once(self):
+        staff = await self.connect(user=self.cook)
+        await staff.send_json_to({'action': 'filter', 'statuses': ['pending', 'preparing']})
+        await staff.receive_json_from()
+        order = await self.create_order(status='preparing')
+        await sync_to_async(broadcast_order)(order, 'order_update', 'pending')
+        event = await staff.receive_json_from()
+        self.assertEqual((event['type'], event['data']['id']), ('order_update', order.id))
+        self.assertTrue(await staff.receive_nothing())
+        await staff.disconnect()
+
+    async def test_feed_socket_tracking_an_order_gets_it_once(self):
+        staff = await self.connect(user=self.cook)
+        order = await self.create_order()
+        await staff.send_json_to({'action': 'subscribe', 'order': order.id})
+        self.assertEqual((await staff.receive_json_from())['type'], 'subscribed')
+        await sync_to_async(broadcast_order)(order, 'order_update')
+        self.assertEqual((await staff.receive_json_from())['type'], 'order_update')
+        self.assertTrue(await staff.receive_nothing())
+        await staff.disconnect()
+
+    async def test_burst_is_coalesced_into_one_frame(self):
+        staff = await self.connect(user=self.cook)
+        orders = [await self.create_order() for _ in range(3)]
+        for order in orders:
+            await sync_to_async(broadcast_order)(order, 'new_order')
+        frame = await staff.receive_json_from()
+        self.assertEqual(frame['type'], 'batch')
+        self.assertEqual([event['data']['id'] for event in frame['events']], [o.id for o in orders])
+        self.assertTrue(await staff.receive_nothing())
+        await staff.disconnect()
+
+    @override_settings(ORDERS_WS_MAX_PENDING=2)
+    async def test_burst_is_capped_for_clients_that_do_not_ack(self):
+        metrics.reset()
+        staff = await self.connect(user=self.cook)
+        order = await self.create_order()
+        for _ in range(5):
+            await sync_to_async(broadcast_order)(order, 'order_update')
+        self.assertEqual(await staff.receive_json_from(), {'type': 'resync'})
+        self.assertTrue(await staff.receive_nothing())
+        self.assertEqual(metrics.get('ws.frames_dropped'), 5)
+        self.assertEqual(metrics.get('ws.queue_depth'), 0)
+        await staff.disconnect()
+
+    @override_settings(ORDERS_WS_MAX_PENDING=2, ORDERS_WS_MAX_UNACKED=1)
+    async def test_client_behind_on_acks_is_told_to_resync(self):
+        staff = await self.connect(user=self.cook)
+        await staff.send_json_to({'action': 'ack', 'received': 0})
+        order = await self.create_order()
+        await sync_to_async(broadcast_order)(order, 'order_update')
+        self.assertEqual((await staff.receive_json_from())['type'], 'order_update')
+
+        # Not acked yet: later events wait, then overflow into a resync
+        for _ in range(3):
+            await sync_to_async(broadcast_order)(order, 'order_update')
+        self.assertTrue(await staff.receive_nothing())
+        await staff.send_json_to({'action': 'ack', 'received': 1})
+        self.assertEqual(await staff.receive_json_from(), {'type': 'resync'})
+        await staff.disconnect()
+
+    @override_settings(ORDERS_WS_MAX_PENDING=2, ORDERS_WS_MAX_UNACKED=1)
+    async def test_client_keeping_up_gets_whole_burst(self):
+        staff = await self.connect(user=self.cook)
+        await staff.send_json_to({'action': 'ack', 'received': 0})
+        orders = [await self.create_order() for _ in range(5)]
+        for order in orders:
+            await sync_to_async(broadcast_order)(order, 'new_order')
+        frame = await staff.receive_json_from()
+        self.assertEqual([event['data']['id'] for event in frame['events']], [o.id for o in orders])
+        await staff.disconnect()
+
+
+class AdminScalingTests(TestCase):
+    """Query counts for the order admin must not grow with the table"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@iiitkota.ac.in', 'admin-pass')
+        category = MenuCategory.objects.create(name='Meals')
+        cls.menu = MenuItem.objects.bulk_create([
+            MenuItem(category=category, name=f'Dish {i}', price='50.00') for i in range(50)
+        ])
+        Order.objects.bulk_create(
+            (Order(customer_name=f'Student {i}', status='pending') for i in range(100000)),
+            batch_size=5000,
+        )
+        cls.order = Order.objects.latest('id')
+        OrderItem.objects.bulk_create([
+            OrderItem(order=cls.order, menu_item=cls.menu[i], quantity=1, subtotal='50.00')
+            for i in range(20)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_changelist_query_count(self):
+        # session, user, outlet filter choices, estimated count, page,
+        # date hierarchy bounds and days
+        with self.assertNumQueries(7):
+            response = self.client.get('/admin/canteen/order/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_filtered_changelist_query_count(self):
+        with self.assertNumQueries(7):
+            response = self.client.get('/admin/canteen/order/', {'status__exact': 'pending'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_search_is_an_index_lookup(self):
+        order_admin = admin.site._registry[Order]
+        for term in (str(self.order.id), '9999999999', 'student@iiitkota.ac.in', 'Student 7'):
+            queryset, _ = order_admin.get_search_results(None, Order.objects.all(), term)
+            self.assertNotIn('SCAN', queryset.explain())
+
+        # session, user, outlet filter choices, exact count, page,
+        # date hierarchy bounds and days
+        with self.assertNumQueries(7):
+            response = self.client.get('/admin/canteen/order/', {'q': str(self.order.id)})
+        self.assertContains(response, f'/admin/canteen/order/{self.order.id}/change/')
+
+    def test_change_form_query_count(self):
+        # session, user, order, outlet choices, items joined with menu items,
+        # content type
+        with self.assertNumQueries(6):
+            response = self.client.get(f'/admin/canteen/order/{self.order.id}/change/')
+        self.assertEqual(response.status_code, 200)
+        # Unselected dishes are not shipped as <option>s on every row
+        self.assertNotContains(response, 'Dish 49')
+
+
+class ForecastTests(CanteenTestCase):
+    def order_at(self, when, quantity, status='completed'):
+        order = Order.objects.create(status=status)
+        Order.objects.filter(pk=order.pk).update(created_at=when)
+        OrderItem.objects.create(order=order, menu_item=self.samosa, quantity=quantity)
+
+    def test_forecast_uses_same_weekday_history(self):
+        target = datetime.date(2026, 3, 16)  # a Monday
+        for weeks_back, quantity in ((3, 10), (2, 20), (1, 40)):
+            day = target - datetime.timedelta(weeks=weeks_back)
+            self.order_at(datetime.datetime(day.year, day.month, day.day, 13, 5, tzinfo=datetime.timezone.utc), quantity)
+        # A Sunday rush and a cancelled order must not leak into Monday
+        self.order_at(datetime.datetime(2026, 3, 15, 13, 5, tzinfo=datetime.timezone.utc), 99)
+        self.order_at(datetime.datetime(2026, 3, 9, 13, 5, tzinfo=datetime.timezone.utc), 50, status='cancelled')
+
+        forecast = forecast_demand(target, history_days=28, alpha=0.5)
+        [item] = forecast['items']
+        self.assertEqual(item['menu_item'], self.samosa.id)
+        [slot] = item['slots']
+        self.assertEqual(slot['time'], '13:00')
+        self.assertEqual(slot['seasonal_naive'], 40)
+        # Level from 0, 10, 20, 40 (four Mondays in the window) with alpha 0.5
+        level = 0
+        for value in (10, 20, 40):
+            level = 0.5 * value + 0.5 * level
+        self.assertAlmostEqual(slot['smoothed'], level)
+
+    def test_vectorised_smoothing_matches_recursion(self):
+        rng = np.random.default_rng(0)
+        series = rng.integers(0, 20, size=(5, 9, SLOTS_PER_DAY)).astype(float)
+        expected = series[:, 0, :].copy()
+        for week in range(1, series.shape[1]):
+            expected = 0.3 * series[:, week, :] + 0.7 * expected
+        actual = np.tensordot(series, smoothing_weights(series.shape[1], 0.3), axes=([1], [0]))
+        np.testing.assert_allclose(actual, expected)
+
+    def test_forecast_endpoint(self):
+        self.assertEqual(self.client.get('/api/menu-items/forecast/').status_code, 403)
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.get('/api/menu-items/forecast/').status_code, 403)
+
+        self.client.force_login(User.objects.create_user('cook', 'cook@iiitkota.ac.in', is_staff=True))
+        response = self.client.get('/api/menu-items/forecast/', {'date': '2026-03-16'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['date'], '2026-03-16')
+        self.assertEqual(self.client.get('/api/menu-items/forecast/', {'date': 'monday'}).status_code, 400)
+
+
+@override_settings(PICKUP_SLOT_CAPACITY=3, PICKUP_SLOT_MINUTES=15,
+                   PICKUP_OPENING_HOURS=('08:00', '21:00'), PICKUP_SLOTS_AHEAD=4)
+class PickupSlotTests(CanteenTestCase):
+    def test_upcoming_starts_respect_opening_hours(self):
+        after = datetime.datetime(2026, 3, 16, 20, 37, tzinfo=datetime.timezone.utc)
+        starts = slots.upcoming_starts(3, after=after)
+        self.assertEqual([start.strftime('%d %H:%M') for start in starts], ['16 20:45', '17 08:00', '17 08:15'])
+
+    def test_order_gets_earliest_slot_with_room(self):
+        first, second = self.client.get('/api/pickup-slots/').json()[:2]
+        response = self.place_order(items=[{'menu_item': self.samosa.id, 'quantity': 3}])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['pickup_time'], first['start'])
+
+        # The first slot is now full, so the next order moves on
+        response = self.place_order(items=[{'menu_item': self.samosa.id, 'quantity': 1}])
+        self.assertEqual(response.json()['pickup_time'], second['start'])
+
+    def test_full_slot_offers_next_free_slot(self):
+        available = self.client.get('/api/pickup-slots/').json()
+        requested = available[0]['start']
+        self.assertEqual(self.place_order(pickup_time=requested).status_code, 201)
+        response = self.place_order(pickup_time=requested)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['next_slot'], available[1]['start'])
+        self.assertEqual(Order.objects.count(), 1)
+
+        remaining = [slot['remaining'] for slot in self.client.get('/api/pickup-slots/').data]
+        self.assertEqual(remaining, [1, 3, 3, 3])
+
+    def test_misaligned_pickup_time_is_rejected(self):
+        start = self.client.get('/api/pickup-slots/').data[0]['start']
+        response = self.place_order(pickup_time=(start + datetime.timedelta(minutes=5)).isoformat())
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('pickup_time', response.data)
+
+    def test_cancelling_releases_capacity(self):
+        order_id = self.place_order().data['id']
+        self.client.patch(f'/api/orders/{order_id}/', {'status': 'cancelled'}, format='json')
+        self.assertEqual(self.client.get('/api/pickup-slots/').data[0]['remaining'], 3)
+
+    def test_uncancelling_takes_the_capacity_back(self):
+        first = self.place_order(items=[{'menu_item': self.samosa.id, 'quantity': 3}]).data
+        self.client.patch(f"/api/orders/{first['id']}/", {'status': 'cancelled'}, format='json')
+        second = self.place_order(items=[{'menu_item': self.samosa.id, 'quantity': 3}]).data
+        self.assertEqual(second['pickup_time'], first['pickup_time'])
+
+        response = self.client.patch(f"/api/orders/{first['id']}/", {'status': 'pending'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Order.objects.get(pk=first['id']).status, 'cancelled')
+
+        self.client.patch(f"/api/orders/{second['id']}/", {'status': 'cancelled'}, format='json')
+        response = self.client.patch(f"/api/orders/{first['id']}/", {'status': 'pending'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/pickup-slots/').data[0]['remaining'], 0)
+
+    def test_put_of_the_retrieved_order_is_accepted(self):
+        order_id = self.place_order().data['id']
+        order = self.client.get(f'/api/orders/{order_id}/').json()
+        response = self.client.put(f'/api/orders/{order_id}/', dict(order, status='preparing'), format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['pickup_time'], order['pickup_time'])
+
+        later = self.client.get('/api/pickup-slots/').data[1]['start'].isoformat()
+        response = self.client.patch(f'/api/orders/{order_id}/', {'pickup_time': later}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('pickup_time', response.data)
+
+    def test_reservation_never_overfills(self):
+        slot = slots.load_slots(slots.upcoming_starts(1))[0]
+        self.assertTrue(slots.try_reserve(slot, 2))
+        self.assertFalse(slots.try_reserve(slot, 2))
+        self.assertTrue(slots.try_reserve(slot, 1))
+        slot.refresh_from_db()
+        self.assertEqual(slot.reserved, 3)
+
+
+class StartupTests(SimpleTestCase):
+    # Cold start of a worker is ~0.6s locally; leave headroom for slow machines
+    IMPORT_BUDGET = 1.2
+    # Only needed by rarely used endpoints or the first websocket connection
+    DEFERRED_MODULES = ('daphne.server', 'numpy', 'canteen.forecasting', 'canteen.consumers', 'channels.auth',
+                        'canteen.notifications')
+
+    def test_worker_cold_start_budget(self):
+        profile = profile_startup('pos.asgi')
+        self.assertLess(profile['phases']['total'], self.IMPORT_BUDGET)
+        imported = {name for name, *_ in profile['modules']}
+        for module in self.DEFERRED_MODULES:
+            self.assertNotIn(module, imported)
+
+
+class FastReadPathTests(CanteenTestCase):
+    def setUp(self):
+        super().setUp()
+        self.request = Request(APIRequestFactory().get('/api/'))
+        self.samosa.image = 'item_images/crispy samosa.png'
+        self.samosa.save()
+        MenuItem.objects.create(category=self.category, name='Chai', price=Decimal('10.50'), available=False)
+        MenuCategory.objects.create(name='Empty')
+        slot = slots.load_slots(slots.upcoming_starts(1))[0]
+        order = Order.objects.create(customer_name='Asha', status='ready', total_price=Decimal('30'),
+                                     pickup_slot=slot, user=self.student)
+        OrderItem.objects.create(order=order, menu_item=self.samosa, quantity=2)
+        Order.objects.create(customer_email='x@iiitkota.ac.in')
+
+    def assertSameRows(self, rows, serializer_class, queryset):
+        expected = serializer_class(queryset, many=True, context={'request': self.request}).data
+        self.assertEqual(json.loads(json.dumps(rows)), json.loads(json.dumps(expected)))
+
+    def test_menu_item_rows_match_serializer(self):
+        queryset = MenuItem.objects.order_by('id')
+        self.assertSameRows(menu_item_rows(queryset, self.request), MenuItemSerializer, queryset)
+
+    def test_menu_category_rows_match_serializer(self):
+        queryset = MenuCategory.objects.order_by('id')
+        self.assertSameRows(menu_category_rows(queryset, self.request), MenuCategorySerializer, queryset)
+
+    def test_order_rows_match_serializer(self):
+        queryset = Order.objects.order_by('-created_at')
+        self.assertSameRows(order_rows(queryset, self.request), OrderSerializer, queryset)
+
+    def test_list_and_retrieve_use_two_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/orders/')
+        self.assertEqual(len(response.json()), 2)
+        order_id = response.json()[0]['id']
+        self.assertEqual(self.client.get(f'/api/orders/{order_id}/').json()['id'], order_id)
+        self.assertEqual(self.client.get('/api/orders/999999/').status_code, 404)
+        for url in ('/api/orders/abc/', '/api/menu-items/abc/', '/api/menu-categories/abc/'):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_filters_still_apply(self):
+        response = self.client.get('/api/menu-items/', {'available': 'false'})
+        self.assertEqual([item['name'] for item in response.json()], ['Chai'])
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        data = {'price': Decimal('1.50'), 'when': datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc),
+                'text': 'line break ₹', 'items': [1, None, True]}
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+        self.assertNotIn(b'\xe2\x80\xa8', ORJSONRenderer().render(data))
+
+    def test_invalid_checkout_item_is_a_400(self):
+        for item in ({'menu_item': 999999, 'quantity': 1}, {'menu_item': self.samosa.id, 'quantity': -1}):
+            response = self.place_order(items=[item])
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('0', response.json()['items'])
+
+
+class OrdersTableETagTests(CanteenTestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+        self.order = Order.objects.create(customer_name='Asha')
+
+    def get_table(self, etag=None, **params):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get('/api/orders/table/', params, headers=headers)
+
+    def test_unchanged_table_is_not_rendered_again(self):
+        first = self.get_table()
+        self.assertEqual(first.status_code, 200)
+        with self.assertTemplateNotUsed('orders_table.html'), self.assertNumQueries(1):
+            second = self.get_table(first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(metrics.get('orders_table.not_modified'), 1)
+        self.assertEqual(metrics.get('orders_table.not_modified_ratio'), 0.5)
+
+    def test_updates_inserts_and_deletes_change_the_etag(self):
+        etag = self.get_table()['ETag']
+        self.order.status = 'ready'
+        self.order.save()
+        response = self.get_table(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'status-ready')
+
+        etag = response['ETag']
+        Order.objects.create(customer_name='Ravi')
+        self.assertEqual(self.get_table(etag).status_code, 200)
+
+        etag = self.get_table()['ETag']
+        self.order.delete()
+        self.assertEqual(self.get_table(etag).status_code, 200)
+
+    def test_etag_follows_status_filter(self):
+        etag = self.get_table(status='pending')['ETag']
+        Order.objects.create(customer_name='Ravi', status='completed')
+        self.assertEqual(self.get_table(etag, status='pending').status_code, 304)
+        self.assertEqual(self.get_table(etag, status='completed').status_code, 200)
+
+
+class OrdersTableRowCacheTests(CanteenTestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+        get_row_cache().clear()
+        self.orders = Order.objects.bulk_create([Order(customer_name=f'Student {i}') for i in range(3)])
+        OrderItem.objects.create(order=self.orders[0], menu_item=self.samosa, quantity=2)
+
+    def test_only_changed_rows_are_rendered(self):
+        cold = render_rows(Order.objects.order_by('id'))
+        self.assertEqual(metrics.get('orders_table.row_misses'), 3)
+        self.assertIn('1 items', cold[0])
+
+        order = self.orders[1]
+        order.status = 'ready'
+        order.save()
+        warm = render_rows(Order.objects.order_by('id'))
+        self.assertEqual(metrics.get('orders_table.row_misses'), 4)
+        self.assertEqual(metrics.get('orders_table.row_hits'), 2)
+        self.assertEqual(warm[0], cold[0])
+        self.assertIn('status-ready', warm[1])
+
+        get_row_cache().clear()
+        self.assertEqual(render_rows(Order.objects.order_by('id')), warm)
+
+    @override_settings(
+        ORDERS_TABLE_ROW_CACHE_ALIAS='rows',
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'rows': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'rows'}},
+    )
+    def test_shared_cache_fills_other_workers(self):
+        render_rows(Order.objects.all())
+        # A fresh worker starts with an empty LRU but finds rows in the shared cache
+        get_row_cache().local.clear()
+        render_rows(Order.objects.all())
+        self.assertEqual(metrics.get('orders_table.row_hits'), 3)
+        caches['rows'].set('unrelated', 1)
+        get_row_cache().clear()
+        self.assertEqual(caches['rows'].get('unrelated'), 1)
+        caches['rows'].clear()
+
+    def test_table_endpoint_lists_rows(self):
+        response = self.client.get('/api/orders/table/')
+        self.assertContains(response, '<tr>', count=4)
+        self.assertContains(response, 'updateOrderStatus(%d' % self.orders[2].id)
+
+
+class RecordingSink:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.written = []
+
+    @contextmanager
+    def session(self):
+        if self.fail:
+            raise ConnectionRefusedError('printer offline')
+        yield lambda name, data: self.written.append(name)
+
+
+class PrintQueueTests(CanteenTestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+        spool = tempfile.TemporaryDirectory()
+        self.addCleanup(spool.cleanup)
+        self.spool = Path(spool.name)
+        printers = override_settings(PRINTERS={
+            'kitchen': {'document': 'ticket', 'sink': f'file://{self.spool}/kitchen'},
+            'receipt': {'document': 'receipt', 'sink': f'file://{self.spool}/receipt'},
+        }, PRINT_MAX_ATTEMPTS=2)
+        printers.enable()
+        self.addCleanup(printers.disable)
+
+    def test_checkout_only_queues_jobs(self):
+        response = self.place_order(special_instructions='Less spicy (please)')
+        self.assertEqual(response.status_code, 201)
+        jobs = PrintJob.objects.filter(order_id=response.data['id'])
+        self.assertEqual(sorted(jobs.values_list('printer', flat=True)), ['kitchen', 'receipt'])
+        self.assertFalse(self.spool.exists() and any(self.spool.iterdir()))
+
+    def test_worker_prints_ticket_and_receipt(self):
+        order_id = self.place_order(special_instructions='Less spicy (please)').data['id']
+        self.assertEqual(PrintWorker(workers=1).run_once(), 2)
+
+        ticket = next((self.spool / 'kitchen').iterdir()).read_bytes()
+        self.assertTrue(ticket.startswith(b'\x1b@'))
+        self.assertIn(b'2 x Samosa', ticket)
+        self.assertIn(b'Note: Less spicy (please)', ticket)
+        self.assertTrue(ticket.endswith(b'\x1dVA\x03'))
+
+        receipt = next((self.spool / 'receipt').iterdir()).read_bytes()
+        self.assertTrue(receipt.startswith(b'%PDF-1.4'))
+        self.assertIn(b'Order #%d' % order_id, receipt)
+        # xref offsets must point at their objects for viewers to open the file
+        xref_at = int(receipt.rsplit(b'startxref\n', 1)[1].split()[0])
+        first_offset = int(receipt[xref_at:].split(b'\n')[3].split()[0])
+        self.assertTrue(receipt[first_offset:].startswith(b'1 0 obj'))
+
+        self.assertFalse(PrintJob.objects.exclude(status='done').exists())
+        self.assertEqual(metrics.get('print.queue_depth'), 0)
+
+    def test_failed_job_holds_back_its_printer_until_it_gives_up(self):
+        first, second = [self.place_order().data['id'] for _ in range(2)]
+        worker = PrintWorker(workers=1)
+        kitchen = worker.lanes[0]
+        kitchen.sink = RecordingSink(fail=True)
+
+        worker.run_once()
+        head = PrintJob.objects.get(order_id=first, printer='kitchen')
+        self.assertEqual((head.status, head.attempts), ('pending', 1))
+        self.assertIn('printer offline', head.last_error)
+        self.assertEqual(metrics.get('print.queue_depth.kitchen'), 2)
+        self.assertEqual(metrics.get('print.queue_depth.receipt'), 0)
+
+        # Backoff: nothing is attempted until the head job is due again
+        worker.run_once()
+        self.assertEqual(PrintJob.objects.get(pk=head.pk).attempts, 1)
+
+        PrintJob.objects.filter(pk=head.pk).update(next_attempt_at=None)
+        worker.run_once()
+        self.assertEqual(PrintJob.objects.get(pk=head.pk).status, 'failed')
+
+        kitchen.sink = RecordingSink()
+        worker.run_once()
+        tail = PrintJob.objects.get(order_id=second, printer='kitchen')
+        self.assertEqual(kitchen.sink.written, [f'kitchen-{tail.id}.bin'])
+
+    def test_jobs_print_in_queue_order(self):
+        for _ in range(5):
+            self.place_order()
+        worker = PrintWorker(workers=1, batch_size=2)
+        worker.lanes[0].sink = RecordingSink()
+        worker.run_once()
+        ids = PrintJob.objects.filter(printer='kitchen').order_by('id').values_list('id', flat=True)
+        self.assertEqual(worker.lanes[0].sink.written, [f'kitchen-{id}.bin' for id in ids])
+
+
+class RecordingSMS:
+    def __init__(self, refuse=(), down=False):
+        self.refuse = refuse
+        self.down = down
+        self.sessions = 0
+        self.sent = []
+
+    @contextmanager
+    def session(self):
+        self.sessions += 1
+        if self.down:
+            raise ConnectionRefusedError('gateway unreachable')
+
+        def send(recipient, message):
+            if recipient in self.refuse:
+                raise ValueError('unknown number')
+            self.sent.append(recipient)
+        yield send
+
+
+@override_settings(NOTIFY_MAX_ATTEMPTS=2, SMS_BACKEND='canteen.notifications.LocmemSMSBackend')
+class NotificationTests(CanteenTestCase):
+    def setUp(self):
+        super().setUp()
+        notifications.sms_outbox.clear()
+
+    def mark_ready(self, order_id):
+        return self.client.patch(f'/api/orders/{order_id}/', {'status': 'ready'}, format='json')
+
+    def test_marking_ready_only_queues(self):
+        order_id = self.place_order(customer_email='asha@example.com').data['id']
+        self.assertEqual(self.mark_ready(order_id).status_code, 200)
+        self.mark_ready(order_id)
+
+        queued = Notification.objects.filter(order_id=order_id)
+        self.assertEqual(sorted(queued.values_list('channel', 'recipient')),
+                         [('email', 'asha@example.com'), ('sms', '9999999999')])
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(notifications.sms_outbox, [])
+
+    def test_worker_sends_each_channel_over_one_connection(self):
+        for _ in range(3):
+            self.mark_ready(self.place_order(customer_email='asha@example.com').data['id'])
+        worker = NotificationWorker(workers=1)
+        worker.lanes[1].channel = sms = RecordingSMS()
+
+        with mock.patch('canteen.notifications.get_connection', wraps=notifications.get_connection) as connect:
+            self.assertEqual(worker.run_once(), 6)
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual(sms.sessions, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn('is ready for pickup', mail.outbox[0].body)
+        self.assertFalse(Notification.objects.exclude(status='sent').exists())
+        self.assertEqual(metrics.get('notify.queue_depth'), 0)
+
+    def test_refused_recipient_backs_off_without_holding_back_others(self):
+        refused = self.place_order(customer_phone='123').data['id']
+        delivered = self.place_order().data['id']
+        for order_id in (refused, delivered):
+            self.mark_ready(order_id)
+        worker = NotificationWorker(workers=1)
+        worker.lanes[1].channel = sms = RecordingSMS(refuse={'123'})
+
+        worker.run_once()
+        self.assertEqual(sms.sent, ['9999999999'])
+        pending = Notification.objects.get(order_id=refused)
+        self.assertEqual((pending.status, pending.attempts), ('pending', 1))
+        self.assertIn('unknown number', pending.last_error)
+
+        # Backoff: not retried until it is due
+        worker.run_once()
+        self.assertEqual(Notification.objects.get(pk=pending.pk).attempts, 1)
+        Notification.objects.filter(pk=pending.pk).update(next_attempt_at=None)
+        worker.run_once()
+        self.assertEqual(Notification.objects.get(pk=pending.pk).status, 'failed')
+
+    def test_unreachable_gateway_retries_the_whole_batch(self):
+        for _ in range(2):
+            self.mark_ready(self.place_order().data['id'])
+        worker = NotificationWorker(workers=1)
+        worker.lanes[1].channel = RecordingSMS(down=True)
+
+        self.assertEqual(worker.run_once(), 0)
+        self.assertEqual(list(Notification.objects.values_list('status', 'attempts')), [('pending', 1)] * 2)
+        self.assertEqual(metrics.get('notify.queue_depth.sms'), 2)
+
+
+class OutletTests(CanteenTestCase):
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+        metrics.reset()
+        self.north = Outlet.objects.create(name='North Block', slug='north-block')
+        self.south = Outlet.objects.create(name='South Block', slug='south-block')
+        snacks = MenuCategory.objects.create(outlet=self.north, name='Snacks')
+        self.vada = MenuItem.objects.create(category=snacks, name='Vada Pav', price=Decimal('20.00'))
+        self.south_snacks = MenuCategory.objects.create(outlet=self.south, name='Bakery')
+        self.puff = MenuItem.objects.create(category=self.south_snacks, name='Veg Puff', price=Decimal('18.00'))
+
+    def test_items_follow_their_category_outlet(self):
+        self.assertEqual(self.vada.outlet, self.north)
+        self.south_snacks.outlet = self.north
+        self.south_snacks.save()
+        self.puff.refresh_from_db()
+        self.assertEqual(self.puff.outlet, self.north)
+
+    def test_menu_and_orders_are_scoped_by_outlet(self):
+        response = self.client.get('/api/menu-items/', {'outlet': self.north.id})
+        self.assertEqual([item['name'] for item in response.json()], ['Vada Pav'])
+        response = self.client.get('/api/menu-categories/', {'outlet': self.south.id})
+        self.assertEqual([item['name'] for item in response.json()[0]['items']], ['Veg Puff'])
+
+        Order.objects.create(outlet=self.north)
+        Order.objects.create(outlet=self.south)
+        response = self.client.get('/api/orders/', {'outlet': self.south.id})
+        self.assertEqual([order['outlet'] for order in response.json()], [self.south.id])
+        self.assertEqual(self.client.get('/api/orders/', {'outlet': 'north'}).status_code, 400)
+
+    def test_checkout_takes_outlet_from_items(self):
+        response = self.place_order(items=[{'menu_item': self.vada.id, 'quantity': 1}])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['outlet'], self.north.id)
+
+        mixed = [{'menu_item': self.vada.id, 'quantity': 1}, {'menu_item': self.puff.id, 'quantity': 1}]
+        self.assertEqual(self.place_order(items=mixed).status_code, 400)
+        wrong = self.place_order(outlet=self.south.id, items=[{'menu_item': self.vada.id, 'quantity': 1}])
+        self.assertEqual(wrong.status_code, 400)
+
+    def test_outlet_orders_reach_outlet_groups(self):
+        order = Order.objects.create(outlet=self.north, status='ready')
+        groups = order_groups(order, 'preparing')
+        self.assertIn(f'orders.outlet.{self.north.id}', groups)
+        self.assertIn(f'orders.outlet.{self.north.id}.status.ready', groups)
+        self.assertIn(f'orders.outlet.{self.north.id}.status.preparing', groups)
+        self.assertIn('orders', groups)
+
+    def test_menu_snapshot_is_reused_until_the_menu_changes(self):
+        params = {'outlet': self.north.id}
+        self.client.get('/api/menu-items/', params)
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/menu-items/', params)
+        self.assertEqual(metrics.get('menu_snapshot.hits'), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vada.price = Decimal('25.00')
+            self.vada.save()
+        fresh = self.client.get('/api/menu-items/', params)
+        self.assertEqual(cached.json()[0]['price'], '20.00')
+        self.assertEqual(fresh.json()[0]['price'], '25.00')
+
+    def test_moving_a_category_refreshes_both_outlet_menus(self):
+        south = {'outlet': self.south.id}
+        self.assertEqual(len(self.client.get('/api/menu-items/', south).json()), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.south_snacks.outlet = self.north
+            self.south_snacks.save()
+        self.assertEqual(self.client.get('/api/menu-items/', south).json(), [])
+        self.assertEqual(len(self.client.get('/api/menu-items/', {'outlet': self.north.id}).json()), 2)
+
+    def test_menu_without_outlet_is_read_live(self):
+        self.assertEqual(len(self.client.get('/api/menu-items/?outlet=').json()), 3)
+        MenuItem.objects.create(category=self.category, name='Kachori', price=Decimal('15.00'))
+        self.assertEqual(len(self.client.get('/api/menu-items/?outlet=').json()), 4)
+        self.assertEqual(metrics.get('menu_snapshot.misses'), 0)
+
+
+class ReplicaRoutingTests(CanteenTestCase):
+    def test_router_only_reads_replica_inside_block(self):
+        router = ReplicaRouter()
+        with mock.patch('canteen.routers.replica_alias', return_value='replica'):
+            self.assertIsNone(router.db_for_read(MenuItem))
+            with use_replica():
+                self.assertEqual(router.db_for_read(MenuItem), 'replica')
+                self.assertEqual(router.db_for_write(MenuItem), 'default')
+            self.assertIsNone(router.db_for_read(MenuItem))
+        self.assertIs(router.allow_migrate('replica', 'canteen'), False)
+
+    def test_outlet_menu_snapshots_are_filled_from_primary_only(self):
+        caches['default'].clear()
+        metrics.reset()
+        params = {'outlet': Outlet.objects.create(name='North Block', slug='north-block').id}
+        with mock.patch('canteen.routers.replica_alias', return_value='default') as replica:
+            self.client.get('/api/menu-items/', params)
+        self.assertFalse(replica.called)
+        self.assertEqual(metrics.get('menu_snapshot.misses'), 1)
+
+        # A client that has just written reads live instead of the shared snapshot
+        self.client.cookies[PIN_COOKIE] = str(int(time.time()) + 60)
+        self.client.get('/api/menu-items/', params)
+        self.assertEqual(metrics.get('menu_snapshot.hits'), 0)
+
+    def test_menu_reads_use_replica_until_client_writes(self):
+        # Route "replica" reads to the test database and watch for them
+        with mock.patch('canteen.routers.replica_alias', return_value='default') as replica:
+            self.client.get('/api/menu-items/')
+            self.assertTrue(replica.called)
+
+            replica.reset_mock()
+            self.client.get('/api/orders/')
+            self.assertFalse(replica.called)
+
+            response = self.place_order()
+            self.assertIn(PIN_COOKIE, response.cookies)
+            replica.reset_mock()
+            self.client.get('/api/menu-items/')
+            self.client.get('/api/orders/mine/')
+            self.assertFalse(replica.called)
+
+    def test_order_history_reads_replica(self):
+        self.client.force_login(self.student)
+        with mock.patch('canteen.routers.replica_alias', return_value='default') as replica:
+            self.assertEqual(self.client.get('/api/orders/mine/').status_code, 200)
+        self.assertTrue(replica.called)
+
+
+class BenchmarkGateTests(TestCase):
+    def test_factories_seed_history(self):
+        menu = seed_menu(2, 3)
+        orders = seed_orders(50, menu, days=30)
+        self.assertEqual(Order.objects.count(), 50)
+        oldest = Order.objects.order_by('created_at').first()
+        self.assertLess(oldest.created_at, timezone.now() - datetime.timedelta(days=1))
+        for order in Order.objects.prefetch_related('items')[:10]:
+            self.assertEqual(order.total_price, sum(item.subtotal for item in order.items.all()))
+        self.assertEqual(seed_orders(50, menu, days=30, seed=0)[0].customer_name, orders[0].customer_name)
+
+    def test_measure_counts_queries(self):
+        record = measure(lambda: list(MenuItem.objects.all()), number=2, repeat=1)
+        self.assertEqual(record['queries'], 1)
+
+    def test_regressions_beyond_threshold_or_extra_queries(self):
+        baseline = {'checkout': {'create': {'seconds': 0.010, 'queries': 10},
+                                 'tiny': {'seconds': 1e-7}}}
+        self.assertEqual(find_regressions(baseline, {'checkout': {
+            'create': {'seconds': 0.012, 'queries': 10},
+            'tiny': {'seconds': 5e-7},
+            'new case': {'seconds': 1.0},
+        }}, threshold=0.25), [])
+
+        regressions = find_regressions(baseline, {'checkout': {'create': {'seconds': 0.013, 'queries': 11}}})
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('10 -> 11 queries', regressions[1])
+        self.assertEqual(find_regressions({'fanout': {'deliveries': {'count': 20}}},
+                                          {'fanout': {'deliveries': {'count': 2020}}}),
+                         ['fanout: deliveries: 20 -> 2020'])
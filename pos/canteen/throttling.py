@@ -0,0 +1,183 @@
+"""Token-bucket throttles for the checkout and auth endpoints.
+
+Each throttle has a ``scope`` and checks one bucket per identity kind
+(client IP, session, account). Rates come from
+``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']``; a ``'<scope>.<kind>'`` entry
+overrides the plain ``'<scope>'`` rate for that identity kind::
+
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '20/min',          # per IP
+        'login.account': '5/min',   # per submitted email from one IP
+    }
+
+Bucket state lives in a bounded in-process LRU by default. Set
+``THROTTLE_STORE = 'cache'`` to keep it in a Django cache shared by all
+workers instead.
+"""
+import functools
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .caching import LRUCache
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@functools.lru_cache(maxsize=None)
+def parse_rate(rate):
+    """Turn ``'10/min'`` into ``(capacity, tokens_per_second)``"""
+    if rate is None:
+        return None
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class MemoryBucketStore:
+    """Per-process buckets, evicted by LRU and once they would be full again"""
+
+    def __init__(self, maxsize=50000, clock=time.monotonic):
+        self.clock = clock
+        self._buckets = LRUCache(maxsize=maxsize, clock=clock)
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, per_second):
+        """Take one token; return ``(allowed, seconds_until_next_token)``"""
+        with self._lock:
+            now = self.clock()
+            tokens, last = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * per_second)
+            if tokens < 1:
+                # Keep the drained state; nothing changed so the TTL can stay
+                return False, (1 - tokens) / per_second
+            tokens -= 1
+            # An untouched bucket is full again after this long, so forget it
+            self._buckets.set(key, (tokens, now), ttl=(capacity - tokens) / per_second)
+            return True, 0
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class CacheBucketStore:
+    """Buckets kept in a Django cache so every worker shares the same limits.
+
+    The read-modify-write is not atomic across workers, so a burst that lands
+    on several workers at once may let a few extra requests through.
+    """
+
+    clock = staticmethod(time.time)
+
+    def __init__(self, alias='default', maxsize=50000):
+        self.cache = caches[alias]
+        # Buckets this worker wrote, so clear() leaves the rest of the alias alone
+        self._written = LRUCache(maxsize=maxsize)
+
+    def consume(self, key, capacity, per_second):
+        now = self.clock()
+        tokens, last = self.cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + (now - last) * per_second)
+        if tokens < 1:
+            return False, (1 - tokens) / per_second
+        tokens -= 1
+        timeout = max(1, int((capacity - tokens) / per_second) + 1)
+        self.cache.set(key, (tokens, now), timeout)
+        self._written.set(key, True, ttl=timeout)
+        return True, 0
+
+    def clear(self):
+        """Forget the buckets this worker wrote; other workers' expire on their own"""
+        self.cache.delete_many(self._written.keys())
+        self._written.clear()
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        if getattr(settings, 'THROTTLE_STORE', 'memory') == 'cache':
+            _store = CacheBucketStore(getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default'),
+                                      getattr(settings, 'THROTTLE_MAX_KEYS', 50000))
+        else:
+            _store = MemoryBucketStore(getattr(settings, 'THROTTLE_MAX_KEYS', 50000))
+    return _store
+
+
+@receiver(setting_changed)
+def _reset_store(*, setting, **kwargs):
+    global _store
+    if setting in ('THROTTLE_STORE', 'THROTTLE_CACHE_ALIAS', 'THROTTLE_MAX_KEYS', 'REST_FRAMEWORK'):
+        _store = None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+    key_kinds = ('ip',)
+
+    def allow_request(self, request, view):
+        self.wait_time = 0
+        store = get_store()
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+
+        for kind in self.key_kinds:
+            rate = parse_rate(rates.get(f'{self.scope}.{kind}', rates.get(self.scope)))
+            ident = getattr(self, f'get_{kind}_ident')(request)
+            if rate is None or ident is None:
+                continue
+            allowed, wait = store.consume(f'throttle:{self.scope}:{kind}:{ident}', *rate)
+            if not allowed:
+                self.wait_time = wait
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_time
+
+    def get_ip_ident(self, request):
+        # Without a proxy count X-Forwarded-For is whatever the client sent
+        if not api_settings.NUM_PROXIES:
+            return request.META.get('REMOTE_ADDR')
+        return self.get_ident(request)
+
+    def get_session_ident(self, request):
+        session = getattr(request, 'session', None)
+        return session.session_key if session is not None else None
+
+    def get_account_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return None
+
+
+class CheckoutThrottle(TokenBucketThrottle):
+    scope = 'checkout'
+    key_kinds = ('ip', 'session', 'account')
+
+
+class LoginThrottle(TokenBucketThrottle):
+    scope = 'login'
+    key_kinds = ('ip', 'account')
+
+    def get_account_ident(self, request):
+        # Brute force targets the submitted account, not the (anonymous) user.
+        # The IP is part of the key so that failures sent from elsewhere
+        # cannot lock the owner out of their own account
+        email = str(request.data.get('email', '')).strip().lower()
+        if not email:
+            return None
+        return hashlib.sha1(f'{email}|{self.get_ip_ident(request)}'.encode()).hexdigest()
+
+
+class RegisterThrottle(TokenBucketThrottle):
+    scope = 'register'
+    key_kinds = ('ip',)
@@ -1,33 +1,167 @@
-from django.shortcuts import render
-from django.http import HttpResponse
-from django.views.decorators.csrf import csrf_protect
-from django.utils.decorators import method_decorator
-from django.template.loader import render_to_string
-from rest_framework import viewsets, filters, permissions
-from rest_framework.decorators import action
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Count, Max, Prefetch
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+from django.utils.dateparse import parse_date
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django_filters.rest_framework import DjangoFilterBackend
-from .models import MenuCategory, MenuItem, Order
+from . import slots
+from .broadcast import broadcast_order, remember_order
+from .metrics import metrics
+from .models import MenuCategory, MenuItem, Order, OrderItem
+from .pagination import OrderHistoryPagination
+from .readers import menu_category_rows, menu_item_rows, order_rows
+from .routers import may_read_replica, pinned_to_primary, read_from_replica, use_replica
 from .serializers import MenuCategorySerializer, MenuItemSerializer, OrderSerializer
+from .snapshots import menu_snapshot
+from .throttling import CheckoutThrottle
 
 
-class MenuCategoryViewSet(viewsets.ModelViewSet):
+class FastReadMixin:
+    """Serve list/retrieve from ``.values()`` rows instead of the serializer.
+
+    ``read_rows(queryset, request)`` must return the same dicts the
+    serializer would; writes and paginated lists keep using the serializer.
+    Retrieve skips object-level permission checks, which these AllowAny
+    viewsets do not use.
+    """
+    read_rows = None
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(self.read_rows(queryset, request))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, DjangoValidationError):
+            # A malformed pk cannot match anything, as in get_object_or_404
+            raise Http404
+        rows = self.read_rows(queryset, request)
+        if not rows:
+            raise Http404
+        return Response(rows[0])
+
+
+class ReplicaReadMixin:
+    """Run ``replica_actions`` against the read replica for safe requests,
+    unless the client has just written (see ``routers.py``)"""
+    replica_actions = ('list', 'retrieve')
+
+    def dispatch(self, request, *args, **kwargs):
+        with use_replica(False):
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Only after authentication, so sessions are always read from the primary
+        if self.action in self.replica_actions and may_read_replica(request):
+            read_from_replica()
+
+
+class OutletScopedMixin:
+    """Narrow every read to one counter with ``?outlet=<id>``"""
+
+    def get_outlet_id(self):
+        outlet = self.request.query_params.get('outlet')
+        if not outlet:
+            return None
+        if not outlet.isdigit():
+            raise ValidationError({'outlet': 'Expected an outlet id'})
+        return int(outlet)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        outlet_id = self.get_outlet_id()
+        if outlet_id is not None:
+            queryset = queryset.filter(outlet_id=outlet_id)
+        return queryset
+
+
+class MenuSnapshotMixin:
+    """Serve a plain ``?outlet=<id>`` menu list from the outlet's snapshot.
+
+    Lists with search or other filters, or without an outlet, are read live,
+    and so are lists for a client pinned to the primary after a write.
+    """
+    snapshot_kind = None
+
+    def list(self, request, *args, **kwargs):
+        outlet_id = self.get_outlet_id()
+        if (outlet_id is None or list(request.query_params) != ['outlet'] or self.paginator is not None
+                or pinned_to_primary(request)):
+            return super().list(request, *args, **kwargs)
+
+        def build():
+            # Snapshots are shared and outlive replica lag, so only the primary fills them
+            with use_replica(False):
+                return self.read_rows(self.filter_queryset(self.get_queryset()), request)
+        return Response(menu_snapshot(self.snapshot_kind, outlet_id, request, build))
+
+
+class MenuCategoryViewSet(ReplicaReadMixin, OutletScopedMixin, MenuSnapshotMixin, FastReadMixin,
+                          viewsets.ModelViewSet):
     queryset = MenuCategory.objects.all()
     serializer_class = MenuCategorySerializer
     permission_classes = [permissions.AllowAny]
+    read_rows = staticmethod(menu_category_rows)
+    snapshot_kind = 'categories'
 
-class MenuItemViewSet(viewsets.ModelViewSet):
+class MenuItemViewSet(ReplicaReadMixin, OutletScopedMixin, MenuSnapshotMixin, FastReadMixin,
+                      viewsets.ModelViewSet):
     queryset = MenuItem.objects.all()
     serializer_class = MenuItemSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    # Filter backends (django-filter + search) come from DEFAULT_FILTER_BACKENDS,
+    # which DRF imports on the first request rather than at start-up
     filterset_fields = ['category', 'available']
     search_fields = ['name', 'description']
     permission_classes = [permissions.AllowAny]
+    read_rows = staticmethod(menu_item_rows)
+    snapshot_kind = 'items'
+    replica_actions = ('list', 'retrieve', 'forecast')
+
+    # Staff only: each call crunches up to three years of order history
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def forecast(self, request):
+        """Forecast demand per item and 15-minute slot for prep planning"""
+        # NumPy is only needed here, so keep it out of the import path
+        from .forecasting import forecast_demand
+
+        target_date = None
+        if request.GET.get('date'):
+            target_date = parse_date(request.GET['date'])
+            if target_date is None:
+                return Response({'error': 'date must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            history_days = int(request.GET.get('history_days', 365))
+            alpha = float(request.GET.get('alpha', 0.3))
+        except ValueError:
+            return Response({'error': 'history_days and alpha must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        if not (7 <= history_days <= 3 * 365 and 0 < alpha <= 1):
+            return Response({'error': 'history_days must be 7-1095 and alpha in (0, 1]'}, status=status.HTTP_400_BAD_REQUEST)
 
-class OrderViewSet(viewsets.ModelViewSet):
+        return Response(forecast_demand(target_date, history_days, alpha))
+
+class OrderViewSet(ReplicaReadMixin, OutletScopedMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all().order_by('-created_at')
     serializer_class = OrderSerializer
     permission_classes = [permissions.AllowAny]
+    read_rows = staticmethod(order_rows)
+    # Staff screens need every new order at once, so only history uses the replica
+    replica_actions = ('mine',)
+
+    def get_throttles(self):
+        # Only checkout writes are rate limited; staff polling stays unthrottled
+        if self.action == 'create':
+            return [CheckoutThrottle()]
+        return super().get_throttles()
 
     def create(self, request, *args, **kwargs):
         """Override create method to handle order creation"""
@@ -42,6 +176,29 @@ class OrderViewSet(viewsets.ModelViewSet):
             print(f"[CSRF DEBUG] error reading meta: {e}")
         return super().create(request, *args, **kwargs)
 
+    def perform_create(self, serializer):
+        # Link the order to the signed-in account so it shows up in "my orders"
+        user = self.request.user
+        order = serializer.save(user=user if user.is_authenticated else None)
+        # Lets this browser track the order over ws/orders/ without an account
+        remember_order(self.request.session, order.id)
+        # serializer.data is cached, so the response reuses this rendering
+        data = serializer.data
+        transaction.on_commit(lambda: broadcast_order(order, 'new_order', data=data))
+
+    def perform_update(self, serializer):
+        previous_status = serializer.instance.status
+        order = serializer.save()
+        if order.status == 'cancelled' and previous_status != 'cancelled':
+            slots.release(order)
+        if order.status == 'ready' and previous_status != 'ready':
+            from .notifications import enqueue_ready
+
+            # Only queued here; notify_worker sends them
+            enqueue_ready(order)
+        data = serializer.data
+        transaction.on_commit(lambda: broadcast_order(order, 'order_update', previous_status, data))
+
     def partial_update(self, request, *args, **kwargs):
         """Handle PATCH requests to update order status"""
         return super().partial_update(request, *args, **kwargs)
@@ -54,6 +211,11 @@ class OrderViewSet(viewsets.ModelViewSet):
         """Handle DELETE requests"""
         return super().destroy(request, *args, **kwargs)
 
+    def perform_destroy(self, instance):
+        if instance.status not in ('cancelled', 'completed'):
+            slots.release(instance)
+        instance.delete()
+
     @action(detail=False, methods=['get'])
     def table(self, request):
         """Return HTML table for HTMX updates"""
@@ -62,10 +224,72 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         if status_filter:
             orders = orders.filter(status=status_filter)
-        
-        html = render_to_string('orders_table.html', {
-            'orders': orders,
-            'status_choices': Order.STATUS_CHOICES
-        })
-        
-        return HttpResponse(html)
\ No newline at end of file
+
+        # Polls usually find nothing new, so compare a cheap fingerprint of
+        # the order set before rendering anything
+        etag = table_etag(orders)
+        metrics.incr('orders_table.requests')
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            metrics.incr('orders_table.not_modified')
+            response = HttpResponseNotModified()
+        else:
+            from .fragments import render_orders_table
+
+            response = HttpResponse(render_orders_table(orders))
+        metrics.set('orders_table.not_modified_ratio', round(
+            metrics.get('orders_table.not_modified') / metrics.get('orders_table.requests'), 3))
+
+        response['ETag'] = etag
+        # Make browsers revalidate every poll instead of reusing a stale table
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def mine(self, request):
+        """Return the signed-in user's orders, newest first"""
+        # Only orders linked to the account: registration does not verify
+        # the email address, so guest orders are never matched by it
+        orders = Order.objects.filter(user=request.user).prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('menu_item'))
+        )
+
+        paginator = OrderHistoryPagination()
+        page = paginator.paginate_queryset(orders, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+def table_etag(orders):
+    """ETag for a set of orders: row count plus latest ``updated_at``.
+
+    Every save bumps ``updated_at`` and deletes change the count, so the tag
+    moves whenever the rendered table would.
+    """
+    fingerprint = orders.order_by().aggregate(count=Count('id'), latest=Max('updated_at'))
+    latest = fingerprint['latest'].timestamp() if fingerprint['latest'] else 0
+    return quote_etag(f"orders-{fingerprint['count']}-{latest:.6f}")
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def metrics_view(request):
+    """Return this worker's in-process counters and gauges"""
+    from .notifications import record_queue_depth as record_notification_depth
+    from .printing import record_queue_depth
+
+    # The print and notification queues live in the database, so their depth
+    # is visible from any worker
+    record_queue_depth()
+    record_notification_depth()
+    return Response(metrics.snapshot())
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def pickup_slots_view(request):
+    """Return upcoming pickup slots and how much capacity each has left"""
+    response = Response(slots.availability())
+    # Polled by the checkout page; a few seconds of staleness is harmless
+    # because reservation re-checks capacity atomically
+    response['Cache-Control'] = 'max-age=5'
+    return response
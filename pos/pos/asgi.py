@@ -9,25 +9,43 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
-from channels.security.websocket import AllowedHostsOriginValidator
+from channels.routing import ProtocolTypeRouter
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pos.settings')
+# Workers serve the app themselves and never need daphne's runserver
+os.environ.setdefault('DJANGO_DAPHNE_RUNSERVER', '0')
 
 # Initialize Django ASGI application early to ensure the AppRegistry
 # is populated before importing code that may import ORM models.
 django_asgi_app = get_asgi_application()
 
-from canteen import routing
+_websocket_app = None
 
-application = ProtocolTypeRouter({
-    "http": django_asgi_app,
-    "websocket": AllowedHostsOriginValidator(
-        AuthMiddlewareStack(
-            URLRouter(
-                routing.websocket_urlpatterns
+
+async def websocket_app(scope, receive, send):
+    """Build the websocket stack on the first connection.
+
+    Workers serve HTTP as soon as Django is ready; the consumers and the
+    channels auth/session middleware are only imported once a socket opens.
+    """
+    global _websocket_app
+    if _websocket_app is None:
+        from channels.auth import AuthMiddlewareStack
+        from channels.routing import URLRouter
+        from channels.security.websocket import AllowedHostsOriginValidator
+        from canteen import routing
+
+        _websocket_app = AllowedHostsOriginValidator(
+            AuthMiddlewareStack(
+                URLRouter(
+                    routing.websocket_urlpatterns
+                )
             )
         )
-    ),
+    return await _websocket_app(scope, receive, send)
+
+
+application = ProtocolTypeRouter({
+    "http": django_asgi_app,
+    "websocket": websocket_app,
 })
@@ -36,7 +36,6 @@ ALLOWED_HOSTS = ['*']
 # Application definition
 
 INSTALLED_APPS = [
-    'daphne',  # Add Daphne for ASGI support
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -51,6 +50,13 @@ INSTALLED_APPS = [
     'authentication',
 ]
 
+# Daphne's app swaps `runserver` for an ASGI one, so `manage.py runserver`
+# serves ws/orders/. Importing it pulls in Twisted and autobahn (~0.5s), so
+# processes that never run the dev server opt out with
+# DJANGO_DAPHNE_RUNSERVER=0; pos/asgi.py does that for the ASGI workers
+if os.environ.get('DJANGO_DAPHNE_RUNSERVER', '1').lower() not in ('0', 'false', 'no'):
+    INSTALLED_APPS.insert(0, 'daphne')  # Add Daphne for ASGI support
+
 # Authentication backends
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
@@ -61,13 +67,81 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'canteen.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # Trusted reverse proxies in front of the app; throttles only read the
+    # client IP from X-Forwarded-For when this is above 0
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+    # Token-bucket rates per route (see canteen/throttling.py);
+    # '<scope>.<kind>' overrides the rate for one identity kind
+    'DEFAULT_THROTTLE_RATES': {
+        'checkout': '20/min',
+        'login': '20/min',
+        'login.account': '5/min',  # per account and client IP
+        'register': '10/hour',
+    },
+}
+
+# Throttle bucket storage: 'memory' (per worker, LRU bounded) or 'cache'
+# (shared through CACHES[THROTTLE_CACHE_ALIAS] across workers)
+THROTTLE_STORE = os.environ.get('THROTTLE_STORE', 'memory')
+THROTTLE_CACHE_ALIAS = 'default'
+THROTTLE_MAX_KEYS = 50000
+
+# Rendered staff-table rows kept per worker; set ORDERS_TABLE_ROW_CACHE_ALIAS
+# to a CACHES alias to share them between workers as well
+ORDERS_TABLE_ROW_CACHE_SIZE = 5000
+ORDERS_TABLE_ROW_CACHE_ALIAS = os.environ.get('ORDERS_TABLE_ROW_CACHE_ALIAS') or None
+
+# Per-outlet menu snapshots (see canteen/snapshots.py)
+MENU_SNAPSHOT_CACHE_ALIAS = 'default'
+MENU_SNAPSHOT_TTL = 60
+
+# Printed on receipts and in order-ready emails and SMS
+CANTEEN_NAME = os.environ.get('CANTEEN_NAME', 'Campus Canteen')
+
+# Printers fed by `manage.py print_worker`. 'document' is 'ticket' (ESC/POS)
+# or 'receipt' (PDF); 'sink' is file:///dir or tcp://host:9100
+PRINTERS = {
+    'kitchen': {
+        'document': 'ticket',
+        'sink': os.environ.get('KITCHEN_PRINTER', f"file://{BASE_DIR / 'prints' / 'kitchen'}"),
+    },
+    'receipt': {
+        'document': 'receipt',
+        'sink': os.environ.get('RECEIPT_PRINTER', f"file://{BASE_DIR / 'prints' / 'receipt'}"),
+    },
 }
+PRINT_BATCH_SIZE = 20
+PRINT_MAX_ATTEMPTS = 5
+PRINT_RETRY_DELAY = 2  # seconds, doubled after each failed attempt
+PRINT_POLL_INTERVAL = 1.0
+
+# Order-ready notifications sent by `manage.py notify_worker`. SMS_BACKEND is
+# canteen.notifications.GatewaySMSBackend (posts to SMS_GATEWAY_URL) or
+# canteen.notifications.LocmemSMSBackend (keeps them in memory)
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '').lower() in ('1', 'true', 'yes')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'canteen@iiitkota.ac.in')
+SMS_BACKEND = os.environ.get('SMS_BACKEND', 'canteen.notifications.LocmemSMSBackend')
+SMS_GATEWAY_URL = os.environ.get('SMS_GATEWAY_URL', '')
+SMS_GATEWAY_TOKEN = os.environ.get('SMS_GATEWAY_TOKEN', '')
+NOTIFY_BATCH_SIZE = 50
+NOTIFY_MAX_ATTEMPTS = 5
+NOTIFY_RETRY_DELAY = 5  # seconds, doubled after each failed attempt
+NOTIFY_POLL_INTERVAL = 1.0
 SITE_ID = 1
 
 MIDDLEWARE = [
@@ -77,6 +151,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'canteen.routers.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -87,7 +162,7 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
-CORS_EXPOSE_HEADERS = ['Content-Type', 'X-CSRFToken']
+CORS_EXPOSE_HEADERS = ['Content-Type', 'X-CSRFToken', 'ETag']
 CORS_ALLOW_CREDENTIALS = True  # Required for credentials: 'include' in frontend
 
 # Allow HTMX headers in preflight (explicit list to avoid import issues)
@@ -165,6 +240,22 @@ DATABASES = {
     }
 }
 
+# Optional read replica for menu browsing, order history and reports (see
+# canteen/routers.py). Locally, REPLICA_DATABASE_PATH names a SQLite copy of
+# the primary kept fresh by `manage.py snapshot_replica --interval 5`
+REPLICA_DATABASE_ALIAS = 'replica'
+if os.environ.get('REPLICA_DATABASE_PATH'):
+    DATABASES[REPLICA_DATABASE_ALIAS] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{os.environ['REPLICA_DATABASE_PATH']}?mode=ro",
+        # Tests read the primary through the same connection
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['canteen.routers.ReplicaRouter']
+# How long a client reads from the primary after writing; keep it above
+# the replica's lag (the snapshot interval locally)
+REPLICA_STICKY_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -212,6 +303,14 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Pickup slots: orders reserve kitchen capacity (in item quantities) in a
+# slot so the lunch rush is spread out instead of queued
+PICKUP_SLOT_MINUTES = 15
+PICKUP_SLOT_CAPACITY = 60
+PICKUP_OPENING_HOURS = ('08:00', '21:00')
+PICKUP_LEAD_MINUTES = 10
+PICKUP_SLOTS_AHEAD = 16
+
 # Channels Configuration
 ASGI_APPLICATION = 'pos.asgi.application'
 
@@ -220,3 +319,10 @@ CHANNEL_LAYERS = {
         'BACKEND': 'channels.layers.InMemoryChannelLayer',
     },
 }
+
+# OrderConsumer batches events into one frame per tick. Clients that ack
+# get no more frames while MAX_UNACKED are unacknowledged, and are told to
+# resync once MAX_PENDING events wait for them (see canteen/consumers.py)
+ORDERS_WS_BATCH_INTERVAL = 0.05
+ORDERS_WS_MAX_PENDING = 100
+ORDERS_WS_MAX_UNACKED = 10
@@ -18,7 +18,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.routers import DefaultRouter
-from canteen.views import MenuCategoryViewSet, MenuItemViewSet, OrderViewSet
+from canteen.views import MenuCategoryViewSet, MenuItemViewSet, OrderViewSet, metrics_view, pickup_slots_view
 
 router = DefaultRouter()
 router.register(r'menu-categories', MenuCategoryViewSet)
@@ -30,6 +30,8 @@ from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/metrics/', metrics_view, name='metrics'),
+    path('api/pickup-slots/', pickup_slots_view, name='pickup_slots'),
     path('api/', include(router.urls)),
     path('api/auth/', include('authentication.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)